@@ -0,0 +1,121 @@
+from collections import namedtuple
+
+from django.core.cache import cache
+from django.db.models import F
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+
+from .models import User
+
+# How long a user's TokenState may be served from cache. Changes made
+# outside UserViewSet (admin, shell) take effect within this many seconds.
+TOKEN_STATE_TTL = 60
+
+# Informational copies for clients; authorization reads TokenState instead,
+# so a stale claim never outlives TOKEN_STATE_TTL.
+CLAIM_FIELDS = ("username", "role", "is_staff", "is_superuser")
+VERSION_CLAIM = "ver"
+
+TokenState = namedtuple("TokenState", ["version", "is_active", "role", "is_staff", "is_superuser"])
+
+
+def add_user_claims(token, user):
+    """Copy what views need from the user row into the token."""
+    for field in CLAIM_FIELDS:
+        token[field] = getattr(user, field)
+    token[VERSION_CLAIM] = user.token_version
+    return token
+
+
+def _state_cache_key(user_id):
+    return f"token-state:{user_id}"
+
+
+def get_token_state(user_id):
+    """The user's TokenState, or None if they are gone; cached for TOKEN_STATE_TTL."""
+    key = _state_cache_key(user_id)
+    state = cache.get(key)
+    if state is None:
+        row = (
+            User.objects.filter(pk=user_id)
+            .values_list("token_version", "is_active", "role", "is_staff", "is_superuser")
+            .first()
+        )
+        state = TokenState(*row) if row else None
+        cache.set(key, state, TOKEN_STATE_TTL)
+    return state
+
+
+def revoke_user_tokens(user_id):
+    """Invalidate every token issued to a user so far (e.g. after a role change)."""
+    User.objects.filter(pk=user_id).update(token_version=F("token_version") + 1)
+    cache.delete(_state_cache_key(user_id))
+
+
+def check_token_version(validated_token, version, is_active):
+    if not is_active:
+        raise AuthenticationFailed("User is inactive", code="user_inactive")
+    if validated_token.get(VERSION_CLAIM) != version:
+        raise InvalidToken("Token was issued before the user's role or status changed; log in again.")
+
+
+class ClaimsUser(TokenUser):
+    """A request user built from the token and cached TokenState.
+
+    Exposes ``id``, ``username``, ``role``, ``is_staff`` and
+    ``is_superuser``; the last three come from TokenState, never from
+    claims. Anything that needs a real ``accounts.User`` instance should
+    compare or assign by id (``user_id=request.user.id``), or use
+    DatabaseJWTAuthentication on that view.
+    """
+
+    def __init__(self, token, state):
+        super().__init__(token)
+        self.state = state
+
+    @property
+    def id(self):
+        return int(self.token[api_settings.USER_ID_CLAIM])
+
+    @property
+    def role(self):
+        return self.state.role
+
+    @property
+    def is_staff(self):
+        return self.state.is_staff
+
+    @property
+    def is_superuser(self):
+        return self.state.is_superuser
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """JWT authentication without the per-request user query.
+
+    Tokens minted before claims were added fall back to loading the row.
+    """
+
+    def get_user(self, validated_token):
+        if api_settings.USER_ID_CLAIM not in validated_token:
+            raise InvalidToken("Token contained no recognizable user identification")
+        if VERSION_CLAIM not in validated_token:
+            return super().get_user(validated_token)
+
+        state = get_token_state(int(validated_token[api_settings.USER_ID_CLAIM]))
+        if state is None:
+            raise AuthenticationFailed("User not found", code="user_not_found")
+        check_token_version(validated_token, state.version, state.is_active)
+        return ClaimsUser(validated_token, state)
+
+
+class DatabaseJWTAuthentication(JWTAuthentication):
+    """Opt-in for views that need the full ``accounts.User`` row."""
+
+    def get_user(self, validated_token):
+        user = super().get_user(validated_token)
+        if VERSION_CLAIM in validated_token:
+            check_token_version(validated_token, user.token_version, user.is_active)
+        return user
@@ -0,0 +1,156 @@
+import hashlib
+import math
+import threading
+import time
+
+from django.conf import settings
+from django.utils import timezone
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+from rest_framework_simplejwt.tokens import RefreshToken
+
+
+class BloomFilter:
+    """Fixed-size bloom filter over strings.
+
+    ``might_contain`` never returns a false negative; false positives
+    happen at roughly ``error_rate`` once ``capacity`` items are added.
+    """
+
+    def __init__(self, capacity, error_rate=0.001):
+        capacity = max(capacity, 1)
+        self.capacity = capacity
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.count = 0
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item):
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hash_count))
+
+    def add(self, item):
+        for pos in self._positions(item):
+            self._bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def might_contain(self, item):
+        return all(self._bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+
+class BlacklistFilter:
+    """Process-local bloom filter of blacklisted refresh token jtis.
+
+    A jti the filter has never seen is not blacklisted, so the common case
+    (a valid token) is answered without SQL. Only possible hits fall
+    through to the real ``BlacklistedToken`` lookup.
+
+    Tokens blacklisted in this process are added immediately. Rows written
+    by other processes are picked up by an incremental sync (new primary
+    keys only) at most every ``sync_interval`` seconds, and the filter is
+    rebuilt from unexpired rows every ``rebuild_interval`` seconds or once
+    it outgrows its capacity. The rebuild also catches rows that committed
+    out of primary key order.
+    """
+
+    MIN_CAPACITY = 1024
+
+    def __init__(self, sync_interval=1, rebuild_interval=300, error_rate=0.001):
+        self.sync_interval = sync_interval
+        self.rebuild_interval = rebuild_interval
+        self.error_rate = error_rate
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._filter = None
+            self._high_water = 0
+            self._synced_at = self._built_at = float("-inf")
+
+    def _rebuild(self):
+        # Read the high-water mark first: a row committed during the scan is
+        # then seen again by the next incremental sync rather than by neither.
+        high_water = BlacklistedToken.objects.order_by("-pk").values_list("pk", flat=True).first() or 0
+        rows = list(
+            BlacklistedToken.objects.filter(token__expires_at__gt=timezone.now())
+            .order_by()
+            .values_list("pk", "token__jti")
+        )
+        bloom = BloomFilter(max(2 * len(rows), self.MIN_CAPACITY), self.error_rate)
+        for _, jti in rows:
+            bloom.add(jti)
+        return bloom, high_water
+
+    def _sync(self):
+        now = time.monotonic()
+        with self._lock:
+            if now - self._synced_at < self.sync_interval:
+                return
+            rebuild = (
+                self._filter is None
+                or now - self._built_at >= self.rebuild_interval
+                or self._filter.count > self._filter.capacity
+            )
+            high_water = self._high_water
+
+        if rebuild:
+            bloom, high_water = self._rebuild()
+            with self._lock:
+                self._filter, self._high_water = bloom, high_water
+                self._synced_at = self._built_at = now
+            return
+
+        rows = list(
+            BlacklistedToken.objects.filter(pk__gt=high_water)
+            .order_by("pk")
+            .values_list("pk", "token__jti")
+        )
+        with self._lock:
+            for pk, jti in rows:
+                self._filter.add(jti)
+                self._high_water = max(self._high_water, pk)
+            self._synced_at = now
+
+    def add(self, jti):
+        self._sync()
+        with self._lock:
+            self._filter.add(jti)
+
+    def might_contain(self, jti):
+        self._sync()
+        with self._lock:
+            return self._filter.might_contain(jti)
+
+    def is_blacklisted(self, jti):
+        if not self.might_contain(jti):
+            return False
+        return BlacklistedToken.objects.filter(token__jti=jti).exists()
+
+
+def _make_filter():
+    config = getattr(settings, "TOKEN_BLACKLIST_FILTER", {})
+    return BlacklistFilter(
+        sync_interval=config.get("SYNC_INTERVAL", 1),
+        rebuild_interval=config.get("REBUILD_INTERVAL", 300),
+        error_rate=config.get("ERROR_RATE", 0.001),
+    )
+
+
+blacklist_filter = _make_filter()
+
+
+class FilteredRefreshToken(RefreshToken):
+    """RefreshToken whose blacklist check goes through ``blacklist_filter``."""
+
+    def check_blacklist(self):
+        if blacklist_filter.is_blacklisted(self.payload[api_settings.JTI_CLAIM]):
+            raise TokenError("Token is blacklisted")
+
+    def blacklist(self):
+        result = super().blacklist()
+        blacklist_filter.add(self.payload[api_settings.JTI_CLAIM])
+        return result
@@ -8,6 +8,8 @@ class User(AbstractUser):
         ("admin", "Admin"),
     )
     role = models.CharField(max_length=20, choices=ROLE_CHOICES, default="student")
+    # Carried in JWTs; bumping it invalidates every token issued so far.
+    token_version = models.PositiveIntegerField(default=0, editable=False)
 
     def __str__(self):
         return self.username
@@ -1,3 +1,145 @@
-from django.test import TestCase
+from datetime import timedelta
+from io import StringIO
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+
+from .blacklist import blacklist_filter
+from .models import User
+
+
+class ClaimsAuthenticationTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.student = User.objects.create_user(username="student", password="pass12345", role="student")
+        self.staff = User.objects.create_user(username="staff", password="pass12345", role="admin", is_staff=True)
+
+    def login(self, username):
+        response = self.client.post("/api/login/", {"username": username, "password": "pass12345"})
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def get(self, url, access):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url, HTTP_AUTHORIZATION=f"Bearer {access}")
+        return response, [q["sql"] for q in ctx.captured_queries]
+
+    def test_requests_do_not_load_the_user_row(self):
+        access = self.login("student")["access"]
+        url = f"/api/students/{self.student.id}/progress/"
+
+        self.get(url, access)  # first request caches the token state
+        response, queries = self.get(url, access)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(any('"accounts_user"' in sql for sql in queries), queries)
+
+    def test_role_change_revokes_existing_tokens(self):
+        student_access = self.login("student")["access"]
+        staff_access = self.login("staff")["access"]
+        self.assertEqual(self.get("/api/notifications/", student_access)[0].status_code, 200)
+
+        response = self.client.patch(
+            f"/api/users/{self.student.id}/", {"role": "teacher"}, HTTP_AUTHORIZATION=f"Bearer {staff_access}"
+        )
+        self.assertEqual(response.status_code, 200)
+
+        self.assertEqual(self.get("/api/notifications/", student_access)[0].status_code, 401)
+        fresh = self.login("student")["access"]
+        self.assertEqual(self.get("/api/notifications/", fresh)[0].status_code, 200)
+
+    def test_staff_flags_come_from_the_user_row_not_the_token(self):
+        access = self.login("staff")["access"]
+        url = "/api/notifications/fanout/999/"
+        self.assertEqual(self.get(url, access)[0].status_code, 404)
+
+        User.objects.filter(pk=self.staff.pk).update(is_staff=False, role="student")
+        cache.clear()  # as if TOKEN_STATE_TTL had passed
+        response, _ = self.get(url, access)
+        self.assertEqual(response.status_code, 403)
+
+    def test_profile_uses_the_database_row(self):
+        access = self.login("student")["access"]
+        response = self.client.patch(
+            "/api/profile/", {"first_name": "Ada"}, HTTP_AUTHORIZATION=f"Bearer {access}"
+        )
+        self.assertEqual(response.status_code, 200)
+        self.student.refresh_from_db()
+        self.assertEqual(self.student.first_name, "Ada")
+
+
+class TokenBlacklistFilterTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        blacklist_filter.reset()
+        self.addCleanup(setattr, blacklist_filter, "sync_interval", blacklist_filter.sync_interval)
+        self.user = User.objects.create_user(username="student", password="pass12345", role="student")
+        self.refresh = self.client.post(
+            "/api/login/", {"username": "student", "password": "pass12345"}
+        ).json()["refresh"]
+
+    def test_valid_refresh_skips_the_blacklist_lookup(self):
+        blacklist_filter.sync_interval = 3600
+        blacklist_filter.might_contain("warm-up")
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post("/api/refresh/", {"refresh": self.refresh})
+
+        self.assertEqual(response.status_code, 200)
+        lookups = [q["sql"] for q in ctx.captured_queries
+                   if 'FROM "token_blacklist_blacklistedtoken" INNER JOIN' in q["sql"]]
+        self.assertEqual(lookups, [])
+
+    def test_logged_out_token_is_rejected(self):
+        access = self.client.post("/api/login/", {"username": "student", "password": "pass12345"}).json()["access"]
+        response = self.client.post(
+            "/api/logout/", {"refresh": self.refresh}, HTTP_AUTHORIZATION=f"Bearer {access}"
+        )
+        self.assertEqual(response.status_code, 200)
+
+        self.assertEqual(self.client.post("/api/refresh/", {"refresh": self.refresh}).status_code, 401)
+        self.assertEqual(self.client.post("/api/verify/", {"token": self.refresh}).status_code, 400)
+
+    def test_blacklist_written_elsewhere_is_picked_up(self):
+        blacklist_filter.sync_interval = 0
+        blacklist_filter.might_contain("warm-up")
+        # Simulate another worker blacklisting the token.
+        BlacklistedToken.objects.create(token=OutstandingToken.objects.get(user=self.user))
+
+        self.assertEqual(self.client.post("/api/refresh/", {"refresh": self.refresh}).status_code, 401)
+
+    def test_blacklist_written_during_rebuild_is_not_missed(self):
+        blacklist_filter.sync_interval = 0
+        outstanding = OutstandingToken.objects.get(user=self.user)
+        inserted = []
+
+        def insert_after_first_query(execute, sql, params, many, context):
+            result = execute(sql, params, many, context)
+            if not inserted and "token_blacklist_blacklistedtoken" in sql:
+                # Another worker commits between the rebuild's two queries.
+                inserted.append(sql)
+                BlacklistedToken.objects.create(token=outstanding)
+            return result
+
+        with connection.execute_wrapper(insert_after_first_query):
+            blacklist_filter.might_contain("warm-up")
+
+        self.assertEqual(len(inserted), 1)
+        self.assertTrue(blacklist_filter.is_blacklisted(outstanding.jti))
+
+    def test_purge_removes_only_expired_tokens(self):
+        past = timezone.now() - timedelta(days=1)
+        for i in range(5):
+            token = OutstandingToken.objects.create(jti=f"old-{i}", token="x", expires_at=past)
+            BlacklistedToken.objects.create(token=token)
+
+        call_command("purge_tokens", batch_size=2, stdout=StringIO())
+
+        self.assertFalse(OutstandingToken.objects.filter(expires_at__lte=timezone.now()).exists())
+        self.assertEqual(BlacklistedToken.objects.count(), 0)
+        self.assertTrue(OutstandingToken.objects.filter(user=self.user).exists())
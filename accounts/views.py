@@ -2,7 +2,6 @@ from rest_framework import generics, permissions, status, viewsets
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated
-from rest_framework_simplejwt.tokens import RefreshToken
 from django.contrib.auth import get_user_model
 from .models import User
 from django.contrib.auth.tokens import default_token_generator
@@ -11,6 +10,8 @@ from django.utils.encoding import force_bytes, force_str
 from .serializers import PassswordResetRequestSerializer, PassswordResetConfirmSerializer
 from .serializers import RegisterSerializer, ProfileSerializer
 from django.contrib.auth.tokens import PasswordResetTokenGenerator
+from .authentication import DatabaseJWTAuthentication, revoke_user_tokens
+from .blacklist import FilteredRefreshToken
 
 
 class RegisterView(generics.CreateAPIView):
@@ -21,6 +22,7 @@ class RegisterView(generics.CreateAPIView):
 class ProfileView(generics.RetrieveUpdateAPIView):
     serializer_class = ProfileSerializer
     permission_classes = [IsAuthenticated]
+    authentication_classes = [DatabaseJWTAuthentication]  # edits the user row itself
 
     def get_object(self):
         return self.request.user
@@ -34,7 +36,7 @@ class LogoutView(APIView):
         if not refresh:
             return Response({"detail": "refresh token required"}, status=status.HTTP_400_BAD_REQUEST)
         try:
-            token = RefreshToken(refresh)
+            token = FilteredRefreshToken(refresh)
             token.blacklist()
         except Exception:
             return Response({"detail": "invalid or expired refresh token"}, status=status.HTTP_400_BAD_REQUEST)
@@ -81,6 +83,7 @@ class PasswordResetConfirmView(generics.GenericAPIView):
 
         user.set_password(new_password)
         user.save()
+        revoke_user_tokens(user.pk)
         return Response({"detail": "Password has been reset successfully"}, status=status.HTTP_200_OK)
 class UserViewSet(viewsets.ModelViewSet):
     queryset = User.objects.all()
@@ -90,4 +93,15 @@ class UserViewSet(viewsets.ModelViewSet):
         # Sirf Admin full access
         if self.action in ['create', 'update', 'partial_update', 'destroy', 'list', 'retrieve']:
             return [permissions.IsAdminUser()]
-        return [permissions.AllowAny()]
\ No newline at end of file
+        return [permissions.AllowAny()]
+
+    def perform_update(self, serializer):
+        old_state = (serializer.instance.role, serializer.instance.is_active)
+        user = serializer.save()
+        if (user.role, user.is_active) != old_state:
+            revoke_user_tokens(user.pk)
+
+    def perform_destroy(self, instance):
+        user_id = instance.pk
+        instance.delete()
+        revoke_user_tokens(user_id)
\ No newline at end of file
@@ -0,0 +1,74 @@
+import re
+
+from django.http import FileResponse, HttpResponse
+from django.utils.cache import get_conditional_response
+
+_RANGE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+class _RangeReader:
+    """File-like view of ``length`` bytes of ``file`` starting at ``start``."""
+
+    def __init__(self, file, start, length):
+        file.seek(start)
+        self.file = file
+        self.remaining = length
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.file.close()
+
+
+def _parse_range(header, size):
+    """(start, end) for a single satisfiable byte range, None to send it all, or False."""
+    match = _RANGE.match(header or '')
+    if not match or not any(match.groups()):
+        return None
+    first, last = match.groups()
+    if first:
+        start, end = int(first), min(int(last), size - 1) if last else size - 1
+    else:
+        start, end = max(size - int(last), 0), size - 1
+    if start > end or start >= size:
+        return False
+    return start, end
+
+
+def immutable_file_response(request, file, etag, content_type, filename=None):
+    """Stream a file whose content never changes under ``etag``.
+
+    Answers If-None-Match with 304, honours a single ``Range`` (206/416)
+    and marks the response cacheable for a year.
+    """
+    not_modified = get_conditional_response(request, etag=etag)
+    if not_modified is not None:
+        file.close()
+        response = not_modified
+    else:
+        size = file.size
+        byte_range = _parse_range(request.headers.get('Range'), size)
+        if byte_range is False:
+            file.close()
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+        elif byte_range is None:
+            response = FileResponse(file, content_type=content_type, filename=filename)
+        else:
+            start, end = byte_range
+            response = FileResponse(
+                _RangeReader(file, start, end - start + 1), content_type=content_type, filename=filename
+            )
+            response.status_code = 206
+            response['Content-Length'] = end - start + 1
+            response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    response['ETag'] = etag
+    response['Accept-Ranges'] = 'bytes'
+    # Per-user document behind auth: browsers may keep it, shared caches may not.
+    response['Cache-Control'] = 'private, max-age=31536000, immutable'
+    return response
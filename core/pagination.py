@@ -0,0 +1,136 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+def _flip(field):
+    return field[1:] if field.startswith('-') else f'-{field}'
+
+
+class KeysetPagination(BasePagination):
+    """Keyset ("seek") pagination with opaque cursors.
+
+    Pages are selected with a WHERE clause on the view's ordering columns
+    rather than an OFFSET, so page 1,000 costs the same as page 1 as long
+    as an index covers the ordering. Views pick their ordering with a
+    ``keyset_ordering`` attribute; it must end in a unique, non-null
+    column (normally ``id``) so every row has a distinct position.
+    """
+    page_size = api_settings.PAGE_SIZE or 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+    cursor_query_param = 'cursor'
+    ordering = ('id',)
+    invalid_cursor_message = 'Invalid cursor'
+
+    def get_ordering(self, view):
+        return tuple(getattr(view, 'keyset_ordering', self.ordering))
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(max(size, 1), self.max_page_size)
+
+    def page_queryset(self, queryset, request, view=None):
+        """Return the unevaluated queryset for the requested page.
+
+        It fetches one extra row so we can tell whether another page
+        exists; pass the evaluated rows to ``build_page``.
+        """
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(view)
+        self.fields = [queryset.model._meta.get_field(f.lstrip('-')) for f in self.ordering]
+        self.size = self.get_page_size(request)
+        self.cursor_given = self.cursor_query_param in request.query_params
+        values, self.reverse = self.decode_cursor(request)
+
+        ordering = [_flip(f) for f in self.ordering] if self.reverse else list(self.ordering)
+        queryset = queryset.order_by(*ordering)
+        if values is not None:
+            queryset = queryset.filter(self.seek(values))
+        return queryset[:self.size + 1]
+
+    def build_page(self, rows):
+        rows = list(rows)
+        has_more = len(rows) > self.size
+        rows = rows[:self.size]
+        if self.reverse:
+            rows.reverse()
+
+        if self.reverse:
+            has_next, has_previous = True, has_more
+        else:
+            has_next, has_previous = has_more, self.cursor_given
+        self.next_link = self.encode_cursor(rows[-1], False) if has_next and rows else None
+        self.previous_link = self.encode_cursor(rows[0], True) if has_previous and rows else None
+        return rows
+
+    def paginate_queryset(self, queryset, request, view=None):
+        return self.build_page(self.page_queryset(queryset, request, view))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        page = self.page_queryset(queryset, request, view)
+        return self.build_page([obj async for obj in page.aiterator(chunk_size=self.size + 1)])
+
+    def seek(self, values):
+        """WHERE clause selecting rows strictly after ``values`` in scan order."""
+        condition = Q()
+        for i, (field, value) in enumerate(zip(self.ordering, values)):
+            descending = field.startswith('-') != self.reverse
+            clause = Q(**{f'{self.fields[i].attname}__{"lt" if descending else "gt"}': value})
+            for prev, prev_value in zip(self.fields[:i], values[:i]):
+                clause &= Q(**{prev.attname: prev_value})
+            condition |= clause
+        return condition
+
+    def encode_cursor(self, obj, reverse):
+        payload = {'v': [f.value_to_string(obj) for f in self.fields]}
+        if reverse:
+            payload['r'] = 1
+        token = urlsafe_b64encode(json.dumps(payload, separators=(',', ':')).encode()).decode()
+        return replace_query_param(self.base_url, self.cursor_query_param, token)
+
+    def decode_cursor(self, request):
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None, False
+        try:
+            payload = json.loads(urlsafe_b64decode(token.encode()))
+            raw = payload['v']
+            if len(raw) != len(self.fields):
+                raise ValueError
+            values = [f.to_python(v) for f, v in zip(self.fields, raw)]
+            return values, bool(payload.get('r'))
+        except (TypeError, ValueError, KeyError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def get_paginated_data(self, data):
+        return {
+            'next': self.next_link,
+            'previous': self.previous_link,
+            'results': data,
+        }
+
+    def get_paginated_response(self, data):
+        return Response(self.get_paginated_data(data))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
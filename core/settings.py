@@ -39,7 +39,7 @@ INSTALLED_APPS = [
 AUTH_USER_MODEL='accounts.User'
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "accounts.authentication.ClaimsJWTAuthentication",
     ),
     "DEFAULT_PERMISSION_CLASSES": (
         "rest_framework.permissions.AllowAny",
@@ -48,6 +48,8 @@ REST_FRAMEWORK = {
         "rest_framework.renderers.JSONRenderer",
         "rest_framework.renderers.BrowsableAPIRenderer",  # <-- this one is key
     ),
+    "DEFAULT_PAGINATION_CLASS": "core.pagination.KeysetPagination",
+    "PAGE_SIZE": 50,
 }
 
 from datetime import timedelta
@@ -57,6 +59,69 @@ SIMPLE_JWT={
 
     "ROTATE_REFRESH_TOKENS":True,
     "BLACKLIST_AFTER_ROTATION":True,
+    "TOKEN_OBTAIN_SERIALIZER": "accounts.serializers.ClaimsTokenObtainPairSerializer",
+    "TOKEN_REFRESH_SERIALIZER": "accounts.serializers.FilteredTokenRefreshSerializer",
+    "TOKEN_VERIFY_SERIALIZER": "accounts.serializers.FilteredTokenVerifySerializer",
+}
+
+# Bloom filter in front of the refresh token blacklist (accounts.blacklist).
+# Tokens blacklisted by another worker are seen within SYNC_INTERVAL seconds.
+TOKEN_BLACKLIST_FILTER = {
+    "SYNC_INTERVAL": 1,
+    "REBUILD_INTERVAL": 300,
+    "ERROR_RATE": 0.001,
+}
+
+# Compiled quiz answer keys (courses.grading). Set SHARED_CACHE to a CACHES
+# alias to share keys between worker processes.
+ANSWER_KEY_CACHE = {
+    "MAX_ENTRIES": 1024,
+    "SHARED_CACHE": None,
+}
+
+# Background notification fan-out (notifications.fanout). ALWAYS_EAGER runs
+# jobs inline after commit instead of on the worker pool.
+NOTIFICATION_FANOUT = {
+    "WORKERS": 2,
+    "CHUNK_SIZE": 1000,
+    "ALWAYS_EAGER": False,
+}
+
+# Server-Sent Events notification stream (notifications.async_views).
+# BROKER must be shared between processes when running more than one.
+NOTIFICATION_STREAM = {
+    "BROKER": "notifications.pubsub.LocalBroker",
+    "QUEUE_SIZE": 100,
+    "HEARTBEAT": 15,
+    # Seconds a stream-token/ token may be used to open a connection.
+    "TOKEN_LIFETIME": 60,
+}
+
+# Lesson heartbeats are coalesced in memory (courses.activity) and written
+# to EnrollmentProgress.last_activity in bulk.
+PROGRESS_HEARTBEATS = {
+    "MAX_PENDING": 1000,
+    "FLUSH_INTERVAL": 10,
+}
+
+# Share of a quiz's questions a student must get right for it to count
+# towards a certificate (courses.certificates).
+CERTIFICATE_PASS_MARK = 0.5
+
+# Certificate PDFs (courses.rendering). WORKERS=None uses one process per CPU;
+# batches with fewer than POOL_THRESHOLD new documents render in-process.
+CERTIFICATE_RENDERING = {
+    "WORKERS": None,
+    "BATCH_SIZE": 1000,
+    "POOL_THRESHOLD": 64,
+}
+# Full-text search (courses.search): "fts5", "memory" or "auto" (FTS5 when
+# migration 0015 created the index). MAX_AGE bounds how stale the memory
+# index may get from other processes' writes; MAX_PAGE caps result depth.
+SEARCH = {
+    "BACKEND": "auto",
+    "MAX_AGE": 300,
+    "MAX_PAGE": 50,
 }
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
@@ -135,6 +200,9 @@ USE_TZ = True
 
 STATIC_URL = "static/"
 
+MEDIA_URL = "media/"
+MEDIA_ROOT = BASE_DIR / "media"
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -8,6 +8,7 @@ urlpatterns = [
 
 
     # Courses app routes
+    path('api/async/', include('courses.async_urls')),
     path('api/', include('courses.urls')),
     path('api/token/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
     path('api/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
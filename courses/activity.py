@@ -0,0 +1,105 @@
+import atexit
+import logging
+import threading
+from functools import reduce
+from operator import or_
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Case, F, Q, Value, When
+
+from .models import EnrollmentProgress, Lesson
+
+logger = logging.getLogger(__name__)
+
+UPDATE_CHUNK_SIZE = 500
+
+
+class ActivityBuffer:
+    """Per-process buffer that coalesces lesson heartbeats.
+
+    Players report "still on this lesson" every few seconds. Each report
+    only moves EnrollmentProgress.last_activity, so heartbeats are kept in memory
+    as (student, lesson) -> latest time and written in bulk when
+    ``max_pending`` distinct pairs have built up or ``flush_interval``
+    seconds after the first pending one, whichever comes first. A crash
+    loses at most that window of activity times, never a completion.
+    """
+
+    def __init__(self, max_pending=1000, flush_interval=10):
+        self.max_pending = max_pending
+        self.flush_interval = flush_interval
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._timer = None
+
+    def touch(self, student_id, lesson_id, at):
+        with self._lock:
+            key = (student_id, lesson_id)
+            if key not in self._pending or self._pending[key] < at:
+                self._pending[key] = at
+            full = len(self._pending) >= self.max_pending
+            if not full and self._timer is None and self.flush_interval:
+                self._timer = threading.Timer(self.flush_interval, self._flush_in_background)
+                self._timer.daemon = True
+                self._timer.start()
+        if full:
+            self.flush()
+
+    def flush(self):
+        """Write everything pending; returns how many heartbeats were coalesced into it."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        if pending:
+            _write_last_activity(pending)
+        return len(pending)
+
+    def _flush_in_background(self):
+        try:
+            self.flush()
+        except Exception:
+            logger.exception("Flushing lesson heartbeats failed")
+        finally:
+            connection.close()
+
+
+def _write_last_activity(pending):
+    course_of = dict(
+        Lesson.objects.filter(pk__in={lesson_id for _, lesson_id in pending})
+        .values_list('id', 'module__course_id')
+    )
+    latest = {}
+    for (student_id, lesson_id), at in pending.items():
+        if lesson_id in course_of:
+            key = (student_id, course_of[lesson_id])
+            latest[key] = max(at, latest.get(key, at))
+
+    items = list(latest.items())
+    for start in range(0, len(items), UPDATE_CHUNK_SIZE):
+        chunk = items[start:start + UPDATE_CHUNK_SIZE]
+        # One UPDATE per chunk; a pair's time only wins if it is newer.
+        EnrollmentProgress.objects.filter(
+            reduce(or_, (Q(student_id=s, course_id=c) for (s, c), _ in chunk))
+        ).update(
+            last_activity=Case(
+                *(
+                    When(
+                        Q(student_id=s, course_id=c) & (Q(last_activity__isnull=True) | Q(last_activity__lt=at)),
+                        then=Value(at),
+                    )
+                    for (s, c), at in chunk
+                ),
+                default=F('last_activity'),
+            )
+        )
+
+
+_config = getattr(settings, 'PROGRESS_HEARTBEATS', {})
+activity_buffer = ActivityBuffer(
+    max_pending=_config.get('MAX_PENDING', 1000),
+    flush_interval=_config.get('FLUSH_INTERVAL', 10),
+)
+atexit.register(activity_buffer.flush)
@@ -0,0 +1,11 @@
+from django.urls import path
+from . import async_views
+
+# Served under /api/async/, mirroring the sync routes in courses.urls.
+urlpatterns = [
+    path('courses/', async_views.course_list, name='async-course-list'),
+    path('courses/<int:pk>/', async_views.course_detail, name='async-course-detail'),
+    path('courses/<int:course_id>/modules/', async_views.module_list, name='async-module-list'),
+    path('modules/<int:module_id>/lessons/', async_views.lesson_list, name='async-lesson-list'),
+    path('students/<int:student_id>/enrollments/', async_views.student_enrollments, name='async-student-enrollments'),
+]
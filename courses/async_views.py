@@ -0,0 +1,103 @@
+"""Async, ASGI-native versions of the hottest read-only course endpoints.
+
+DRF views are sync-only, so under ASGI every request to them is handed to
+a thread executor. These plain Django async views use the async ORM
+directly and reuse the DRF serializers on fully loaded instances (no
+serializer field touches the database), returning the same JSON bodies
+as their sync counterparts in courses.views.
+"""
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse
+from django.views.decorators.http import require_GET
+from rest_framework import status
+from rest_framework.exceptions import APIException
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from accounts.authentication import ClaimsJWTAuthentication
+
+from core.pagination import KeysetPagination
+from .models import Course, Module, Lesson
+from .serializers import CourseSerializer, ModuleSerializer, LessonSummarySerializer
+from .views import CourseViewSet, ModuleListCreateView, LessonListCreateView, StudentEnrollmentListView
+
+_jwt = ClaimsJWTAuthentication()
+
+
+def _json(data, status=status.HTTP_200_OK):
+    return HttpResponse(JSONRenderer().render(data), status=status, content_type='application/json')
+
+
+def _error(exc):
+    detail = exc.detail if isinstance(exc.detail, dict) else {"detail": exc.detail}
+    return _json(detail, status=exc.status_code)
+
+
+async def _authenticate(request):
+    """Return (user, None) or (None, error response), like JWTAuthentication."""
+    try:
+        auth = await sync_to_async(_jwt.authenticate)(request)
+    except APIException as exc:
+        return None, _error(exc)
+    if auth is None:
+        return None, _json(
+            {"detail": "Authentication credentials were not provided."},
+            status=status.HTTP_401_UNAUTHORIZED,
+        )
+    return auth[0], None
+
+
+async def _paginated(request, view_class, serializer_class, queryset):
+    """One keyset page, ordered and sized exactly like ``view_class``."""
+    paginator = KeysetPagination()
+    try:
+        page = await paginator.apaginate_queryset(queryset, Request(request), view=view_class)
+    except APIException as exc:
+        return _error(exc)
+    return _json(paginator.get_paginated_data(serializer_class(page, many=True).data))
+
+
+@require_GET
+async def course_list(request):
+    queryset = Course.objects.with_enrolled_count()
+    return await _paginated(request, CourseViewSet, CourseSerializer, queryset)
+
+
+@require_GET
+async def course_detail(request, pk):
+    expand = set(filter(None, request.GET.get('expand', '').split(',')))
+    queryset = Course.objects.with_enrolled_count()
+    if 'students' in expand:
+        queryset = queryset.prefetch_related('students')
+    try:
+        course = await queryset.aget(pk=pk)
+    except Course.DoesNotExist:
+        return _json({"detail": "No Course matches the given query."}, status=status.HTTP_404_NOT_FOUND)
+    return _json(CourseSerializer(course, context={'expand': expand}).data)
+
+
+@require_GET
+async def module_list(request, course_id):
+    queryset = Module.objects.filter(course_id=course_id)
+    return await _paginated(request, ModuleListCreateView, ModuleSerializer, queryset)
+
+
+@require_GET
+async def lesson_list(request, module_id):
+    queryset = Lesson.objects.filter(module_id=module_id).defer('content')
+    return await _paginated(request, LessonListCreateView, LessonSummarySerializer, queryset)
+
+
+@require_GET
+async def student_enrollments(request, student_id):
+    user, error = await _authenticate(request)
+    if error:
+        return error
+
+    if user.id != student_id and user.role.lower() != "admin":
+        return _json(
+            {"detail": "You cannot view other students' enrollments."},
+            status=status.HTTP_403_FORBIDDEN,
+        )
+
+    queryset = Course.objects.filter(enrollments__student_id=student_id).with_enrolled_count()
+    return await _paginated(request, StudentEnrollmentListView, CourseSerializer, queryset)
@@ -0,0 +1,108 @@
+from django.conf import settings
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import Certificate, Course, EnrollmentProgress, Question, Quiz, QuixAttempt
+
+# Courses handled per pass when issuing across the whole catalogue.
+COURSE_BATCH_SIZE = 200
+INSERT_BATCH_SIZE = 1000
+
+
+def pass_mark():
+    """Fraction of a quiz's questions a student must answer correctly."""
+    return getattr(settings, 'CERTIFICATE_PASS_MARK', 0.5)
+
+
+def _question_count():
+    return Coalesce(
+        Subquery(
+            Question.objects.filter(quiz_id=OuterRef('quiz_id'))
+            .order_by()
+            .values('quiz_id')
+            .annotate(n=Count('*'))
+            .values('n')
+        ),
+        0,
+    )
+
+
+def eligible_students(course_ids, student_ids=None):
+    """{course_id: set of student ids} who have earned a certificate.
+
+    A student qualifies when their EnrollmentProgress shows every lesson
+    completed and, for every quiz in the course that has questions, at
+    least one attempt scored ``pass_mark()`` of its questions. Attempts
+    scoring more than the quiz has questions are impossible and ignored. Three
+    grouped queries cover any number of courses and students.
+    """
+    complete = EnrollmentProgress.objects.filter(
+        course_id__in=course_ids, total_lessons__gt=0, completed_lessons__gte=F('total_lessons')
+    )
+    if student_ids is not None:
+        complete = complete.filter(student_id__in=student_ids)
+    eligible = {}
+    for course_id, student_id in complete.values_list('course_id', 'student_id'):
+        eligible.setdefault(course_id, set()).add(student_id)
+    if not eligible:
+        return {}
+
+    required = dict(
+        Quiz.objects.filter(lesson__module__course_id__in=eligible, questions__isnull=False)
+        .values('lesson__module__course_id')
+        .annotate(n=Count('id', distinct=True))
+        .values_list('lesson__module__course_id', 'n')
+        .order_by()
+    )
+    if not required:
+        return eligible
+
+    passed = (
+        QuixAttempt.objects.filter(quiz__lesson__module__course_id__in=required)
+        .annotate(questions=_question_count())
+        .filter(questions__gt=0, score__gte=F('questions') * pass_mark(), score__lte=F('questions'))
+    )
+    if student_ids is not None:
+        passed = passed.filter(user_id__in=student_ids)
+    passed_counts = {
+        (course_id, student_id): n
+        for course_id, student_id, n in passed.values('quiz__lesson__module__course_id', 'user_id')
+        .annotate(n=Count('quiz_id', distinct=True))
+        .values_list('quiz__lesson__module__course_id', 'user_id', 'n')
+        .order_by()
+    }
+    for course_id, n in required.items():
+        eligible[course_id] = {
+            student_id for student_id in eligible[course_id]
+            if passed_counts.get((course_id, student_id), 0) >= n
+        }
+    return eligible
+
+
+def issue_certificates(course_ids=None, issued_by_id=None):
+    """Create every missing certificate that has been earned.
+
+    Pass ``course_ids`` to limit the run, or None for the whole catalogue.
+    Returns {course_id: number of certificates created}.
+    """
+    if course_ids is None:
+        course_ids = Course.objects.order_by('id').values_list('id', flat=True)
+    course_ids = list(course_ids)
+
+    issued = {}
+    for start in range(0, len(course_ids), COURSE_BATCH_SIZE):
+        batch = course_ids[start:start + COURSE_BATCH_SIZE]
+        eligible = eligible_students(batch)
+        existing = set(
+            Certificate.objects.filter(course_id__in=eligible).values_list('course_id', 'student_id')
+        )
+        missing = [
+            Certificate(course_id=course_id, student_id=student_id, issued_by_id=issued_by_id)
+            for course_id, students in eligible.items()
+            for student_id in students
+            if (course_id, student_id) not in existing
+        ]
+        Certificate.objects.bulk_create(missing, batch_size=INSERT_BATCH_SIZE, ignore_conflicts=True)
+        for certificate in missing:
+            issued[certificate.course_id] = issued.get(certificate.course_id, 0) + 1
+    return issued
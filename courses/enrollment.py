@@ -0,0 +1,116 @@
+import csv
+import io
+from itertools import islice
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Q
+
+from .models import Enrollment
+from .progress import enrollments_added, enrollments_removed
+
+User = get_user_model()
+
+CSV_CHUNK_SIZE = 1000
+
+
+def _resolve(identifiers):
+    """Look up students by id (int) or username (str) in one query.
+
+    Returns {identifier: (user_id, role)} for every identifier that exists.
+    """
+    ids = {i for i in identifiers if isinstance(i, int)}
+    usernames = {i for i in identifiers if isinstance(i, str)}
+    found = {}
+    rows = User.objects.filter(Q(id__in=ids) | Q(username__in=usernames)).values_list('id', 'username', 'role')
+    for user_id, username, role in rows:
+        if user_id in ids:
+            found[user_id] = (user_id, role)
+        if username in usernames:
+            found[username] = (user_id, role)
+    return found
+
+
+def _enrolled_ids(course, user_ids):
+    return set(
+        Enrollment.objects.filter(course_id=course.id, student_id__in=user_ids)
+        .values_list('student_id', flat=True)
+    )
+
+
+def bulk_enroll(course, identifiers):
+    """Enroll many students with a constant number of queries.
+
+    ``identifiers`` mixes user ids (ints) and usernames (strs). Returns one
+    {"student", "status"} outcome per identifier, in input order.
+    """
+    found = _resolve(identifiers)
+    students = {ident: user_id for ident, (user_id, role) in found.items() if role == "student"}
+    already = _enrolled_ids(course, set(students.values()))
+
+    outcomes, new_ids = [], []
+    for ident in identifiers:
+        if ident not in found:
+            status = "not_found"
+        elif ident not in students:
+            status = "not_a_student"
+        elif students[ident] in already:
+            status = "already_enrolled"
+        else:
+            status = "enrolled"
+            already.add(students[ident])
+            new_ids.append(students[ident])
+        outcomes.append({"student": ident, "status": status})
+
+    with transaction.atomic():
+        Enrollment.objects.bulk_create(
+            [Enrollment(course_id=course.id, student_id=user_id) for user_id in new_ids],
+            ignore_conflicts=True,
+        )
+        enrollments_added(course.id, new_ids)
+    return outcomes
+
+
+def bulk_unenroll(course, identifiers):
+    """Unenroll many students with a single DELETE on Enrollment."""
+    found = _resolve(identifiers)
+    enrolled = _enrolled_ids(course, {user_id for user_id, _ in found.values()})
+
+    outcomes, removed = [], set()
+    for ident in identifiers:
+        user_id = found[ident][0] if ident in found else None
+        if user_id is None:
+            status = "not_found"
+        elif user_id in enrolled:
+            status = "unenrolled"
+            enrolled.discard(user_id)
+            removed.add(user_id)
+        else:
+            status = "not_enrolled"
+        outcomes.append({"student": ident, "status": status})
+
+    with transaction.atomic():
+        Enrollment.objects.filter(course_id=course.id, student_id__in=removed).delete()
+        enrollments_removed(course.id, removed)
+    return outcomes
+
+
+def read_csv_identifiers(upload):
+    """Yield chunks of identifiers from an uploaded CSV without loading it whole.
+
+    The CSV needs a header row with an ``id`` or ``username`` column.
+    """
+    reader = csv.DictReader(io.TextIOWrapper(upload, encoding='utf-8-sig', newline=''))
+    fields = reader.fieldnames or []
+    if 'id' in fields:
+        column, convert = 'id', int
+    elif 'username' in fields:
+        column, convert = 'username', str.strip
+    else:
+        raise ValueError("CSV needs an 'id' or 'username' column.")
+
+    while True:
+        chunk = [row[column] for row in islice(reader, CSV_CHUNK_SIZE)]
+        if not chunk:
+            return
+        yield [convert(value) for value in chunk if value and value.strip()]
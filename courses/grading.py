@@ -0,0 +1,143 @@
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models import F
+
+from .models import Answer, Quiz, QuixAttempt
+
+
+def load_answer_key(quiz):
+    """Map question id -> correct option for a quiz, in one query."""
+    return dict(quiz.questions.values_list('id', 'correct_option'))
+
+
+class AnswerKeyCache:
+    """Process-local LRU of compiled answer keys.
+
+    Entries are keyed by (quiz id, Quiz.answer_key_version). The version
+    comes with the Quiz row the view has already loaded, so a bump from
+    any process makes every other process miss and reload instead of
+    grading against a stale key. If ``shared_cache`` names a Django cache
+    alias, local misses are looked up there before hitting the database.
+    """
+
+    def __init__(self, max_entries=1024, shared_cache=None):
+        self.max_entries = max_entries
+        self.shared_cache = shared_cache
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+
+    def get(self, quiz):
+        key = (quiz.pk, quiz.answer_key_version)
+        with self._lock:
+            answer_key = self._entries.get(key)
+            if answer_key is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return answer_key
+
+        answer_key = self._get_shared(key)
+        if answer_key is not None:
+            with self._lock:
+                self.shared_hits += 1
+        else:
+            answer_key = load_answer_key(quiz)
+            self._set_shared(key, answer_key)
+            with self._lock:
+                self.misses += 1
+
+        with self._lock:
+            self._entries[key] = answer_key
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return answer_key
+
+    def _shared_key(self, key):
+        return "answer-key:%s:%s" % key
+
+    def _get_shared(self, key):
+        if not self.shared_cache:
+            return None
+        return caches[self.shared_cache].get(self._shared_key(key))
+
+    def _set_shared(self, key, answer_key):
+        if self.shared_cache:
+            caches[self.shared_cache].set(self._shared_key(key), answer_key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.shared_hits = self.misses = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "shared_hits": self.shared_hits,
+                "misses": self.misses,
+            }
+
+
+_config = getattr(settings, "ANSWER_KEY_CACHE", {})
+answer_key_cache = AnswerKeyCache(
+    max_entries=_config.get("MAX_ENTRIES", 1024),
+    shared_cache=_config.get("SHARED_CACHE"),
+)
+
+
+def invalidate_answer_keys(*quiz_ids):
+    """Bump the answer key version of quizzes whose questions changed."""
+    Quiz.objects.filter(pk__in=[pk for pk in quiz_ids if pk is not None]).update(
+        answer_key_version=F('answer_key_version') + 1
+    )
+
+
+def _question_id(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def grade_submission(quiz, user, answers_data):
+    """Score a quiz submission and persist the attempt with its answers.
+
+    The answer key comes from answer_key_cache and scoring happens in
+    memory; the attempt and all of its Answer rows are then written in one
+    transaction, so the query count no longer grows with the number of
+    questions. Each question is graded once, on its first answer; repeats
+    and answers for questions outside the quiz are ignored, so the score
+    never exceeds the number of questions.
+    """
+    answer_key = answer_key_cache.get(quiz)
+
+    score = 0
+    graded = []
+    seen = set()
+    for ans_data in answers_data:
+        question_id = _question_id(ans_data.get('question'))
+        if question_id not in answer_key or question_id in seen:
+            continue
+        seen.add(question_id)
+
+        selected_option = ans_data.get('selected_option')
+        graded.append((question_id, selected_option))
+        if selected_option and selected_option.upper() == answer_key[question_id].upper():
+            score += 1
+
+    with transaction.atomic():
+        attempt = QuixAttempt.objects.create(user_id=user.id, quiz=quiz, score=score)
+        Answer.objects.bulk_create([
+            Answer(attempt=attempt, question_id=question_id, selected_option=selected_option)
+            for question_id, selected_option in graded
+        ])
+    return attempt
@@ -0,0 +1,77 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.test import AsyncClient, Client
+
+HEADERS = {"host": "localhost"}
+
+
+def _summary(latencies, elapsed):
+    latencies = sorted(latencies)
+    p99 = latencies[int(0.99 * (len(latencies) - 1))]
+    return len(latencies) / elapsed, p99 * 1000
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare requests/sec and p99 latency of a read endpoint served by the "
+        "sync DRF view (WSGI handler) and its /api/async/ twin (ASGI handler)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--path", default="/api/courses/",
+                            help="Sync endpoint path; the async twin is the same path under /api/async/.")
+        parser.add_argument("--requests", type=int, default=500)
+        parser.add_argument("--concurrency", type=int, default=20)
+        parser.add_argument("--token", help="JWT access token for endpoints that need authentication.")
+
+    def handle(self, *args, **options):
+        sync_path = options["path"]
+        async_path = sync_path.replace("/api/", "/api/async/", 1)
+        headers = dict(HEADERS)
+        if options["token"]:
+            headers["authorization"] = f"Bearer {options['token']}"
+
+        n, concurrency = options["requests"], options["concurrency"]
+        results = [
+            (sync_path, "sync/WSGI", self.run_sync(sync_path, headers, n, concurrency)),
+            (async_path, "async/ASGI", self.run_async(async_path, headers, n, concurrency)),
+        ]
+
+        self.stdout.write(f"{n} requests, concurrency {concurrency}")
+        for path, mode, (rps, p99) in results:
+            self.stdout.write(f"{mode:<11} {path:<40} {rps:10.1f} req/s   p99 {p99:8.2f} ms")
+
+    def run_sync(self, path, headers, n, concurrency):
+        def fetch(_):
+            start = time.perf_counter()
+            response = Client(headers=headers).get(path)
+            response.close()
+            latency = time.perf_counter() - start
+            connections.close_all()
+            return latency
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            latencies = list(pool.map(fetch, range(n)))
+        return _summary(latencies, time.perf_counter() - start)
+
+    def run_async(self, path, headers, n, concurrency):
+        async def main():
+            client = AsyncClient(headers=headers)
+            semaphore = asyncio.Semaphore(concurrency)
+
+            async def fetch():
+                async with semaphore:
+                    start = time.perf_counter()
+                    await client.get(path)
+                    return time.perf_counter() - start
+
+            start = time.perf_counter()
+            latencies = await asyncio.gather(*(fetch() for _ in range(n)))
+            return _summary(latencies, time.perf_counter() - start)
+
+        return asyncio.run(main())
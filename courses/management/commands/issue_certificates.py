@@ -0,0 +1,22 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from courses.certificates import issue_certificates
+
+
+class Command(BaseCommand):
+    help = "Issue certificates to every student who has completed their course and passed its quizzes."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--course", type=int, action="append", dest="courses",
+                            help="Only issue for this course id (may be repeated).")
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        issued = issue_certificates(options["courses"])
+        for course_id, count in sorted(issued.items()):
+            self.stdout.write(f"course {course_id}: {count} issued")
+        self.stdout.write(self.style.SUCCESS(
+            f"Issued {sum(issued.values())} certificate(s) in {time.perf_counter() - started:.1f}s."
+        ))
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from courses.progress import rebuild_counters
+
+
+class Command(BaseCommand):
+    help = "Rebuild EnrollmentProgress and Course.lesson_count counters from lesson progress."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--course", type=int, action="append", dest="courses",
+                            help="Only rebuild this course id (may be repeated).")
+        parser.add_argument("--verify", action="store_true",
+                            help="Report drift without fixing it; exits non-zero if any is found.")
+
+    def handle(self, *args, **options):
+        drift = rebuild_counters(options["courses"], fix=not options["verify"])
+        for line in drift:
+            self.stdout.write(line)
+
+        if options["verify"]:
+            if drift:
+                raise CommandError(f"{len(drift)} progress counter(s) out of sync.")
+            self.stdout.write(self.style.SUCCESS("Progress counters are in sync."))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"Rebuilt progress counters, fixed {len(drift)} drift(s)."))
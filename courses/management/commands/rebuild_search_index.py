@@ -0,0 +1,17 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from courses.search import get_backend
+
+
+class Command(BaseCommand):
+    help = "Rebuild the full-text search index from the course, module and lesson tables."
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        backend = get_backend()
+        backend.rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt the {type(backend).__name__} search index in {time.perf_counter() - started:.1f}s."
+        ))
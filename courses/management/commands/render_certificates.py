@@ -0,0 +1,22 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from courses.rendering import render_pending
+
+
+class Command(BaseCommand):
+    help = "Render PDF documents for certificates that do not have one yet."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--course", type=int, action="append", dest="courses",
+                            help="Only render for this course id (may be repeated).")
+        parser.add_argument("--workers", type=int, default=None,
+                            help="Renderer processes (default: one per CPU; 0 renders in this process).")
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        rendered = render_pending(options["courses"], workers=options["workers"])
+        self.stdout.write(self.style.SUCCESS(
+            f"Rendered {rendered} new document(s) in {time.perf_counter() - started:.1f}s."
+        ))
@@ -0,0 +1,90 @@
+# Generated by Django 5.2.5 on 2026-10-18 18:47
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_counters(apps, schema_editor):
+    Course = apps.get_model("courses", "Course")
+    LessonProgress = apps.get_model("courses", "LessonProgress")
+    EnrollmentProgress = apps.get_model("courses", "EnrollmentProgress")
+
+    for course in Course.objects.annotate(
+        actual=models.Count("modules__lessons", distinct=True)
+    ):
+        Course.objects.filter(pk=course.pk).update(lesson_count=course.actual)
+        completed = {
+            student_id: (n, last)
+            for student_id, n, last in LessonProgress.objects.filter(
+                lesson__module__course=course, completed=True
+            )
+            .values_list("student_id")
+            .annotate(n=models.Count("id"), last=models.Max("completed_at"))
+            .order_by()
+        }
+        EnrollmentProgress.objects.bulk_create(
+            [
+                EnrollmentProgress(
+                    course_id=course.pk,
+                    student_id=student_id,
+                    total_lessons=course.actual,
+                    completed_lessons=completed.get(student_id, (0, None))[0],
+                    last_activity=completed.get(student_id, (0, None))[1],
+                )
+                for student_id in course.students.values_list("id", flat=True)
+            ]
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("courses", "0007_certificate"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="course",
+            name="lesson_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.CreateModel(
+            name="EnrollmentProgress",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("completed_lessons", models.PositiveIntegerField(default=0)),
+                ("total_lessons", models.PositiveIntegerField(default=0)),
+                ("last_activity", models.DateTimeField(blank=True, null=True)),
+                (
+                    "course",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="enrollment_progress",
+                        to="courses.course",
+                    ),
+                ),
+                (
+                    "student",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="enrollment_progress",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "unique_together": {("student", "course")},
+            },
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-18 18:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("courses", "0008_enrollmentprogress"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="quiz",
+            name="answer_key_version",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
@@ -0,0 +1,93 @@
+# Generated by Django 5.2.5 on 2026-10-18 18:55
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def copy_enrollments(apps, schema_editor):
+    Course = apps.get_model("courses", "Course")
+    Enrollment = apps.get_model("courses", "Enrollment")
+    Through = Course.students.through
+
+    # The implicit table has no timestamp; auto_now_add stamps copied
+    # rows with the migration time.
+    rows = Through.objects.order_by("id").values_list("course_id", "user_id")
+    batch = []
+    for course_id, user_id in rows.iterator(chunk_size=5000):
+        batch.append(Enrollment(course_id=course_id, student_id=user_id))
+        if len(batch) >= 5000:
+            Enrollment.objects.bulk_create(batch)
+            batch = []
+    Enrollment.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("courses", "0011_course_content_version"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Enrollment",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("enrolled_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "course",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="enrollments",
+                        to="courses.course",
+                    ),
+                ),
+                (
+                    "student",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="enrollments",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name="enrollment",
+            index=models.Index(
+                fields=["course", "student"], name="enrollment_course_student_idx"
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="enrollment",
+            constraint=models.UniqueConstraint(
+                fields=("student", "course"), name="unique_enrollment_student_course"
+            ),
+        ),
+        # The implicit through table can't be altered into Enrollment in
+        # place: copy its rows over, then swap the field.
+        migrations.RunPython(copy_enrollments, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name="course",
+            name="students",
+        ),
+        migrations.AddField(
+            model_name="course",
+            name="students",
+            field=models.ManyToManyField(
+                blank=True,
+                related_name="enrolled_courses",
+                through="courses.Enrollment",
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+    ]
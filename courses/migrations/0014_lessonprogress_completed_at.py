@@ -0,0 +1,19 @@
+# Generated by Django 5.2.5 on 2026-10-18 19:11
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("courses", "0013_course_rating_counters"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="lessonprogress",
+            name="completed_at",
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
@@ -0,0 +1,58 @@
+from django.db import migrations
+
+# rowid = object id * 3 + kind code, matching courses.search._rowid.
+CREATE = """
+CREATE VIRTUAL TABLE courses_search_index USING fts5(
+    kind UNINDEXED, object_id UNINDEXED, course_id UNINDEXED, title, body,
+    tokenize = 'porter unicode61'
+)
+"""
+POPULATE = [
+    """
+    INSERT INTO courses_search_index (rowid, kind, object_id, course_id, title, body)
+    SELECT id * 3, 'course', id, id, title, description FROM courses_course
+    """,
+    """
+    INSERT INTO courses_search_index (rowid, kind, object_id, course_id, title, body)
+    SELECT id * 3 + 1, 'module', id, course_id, title, description
+    FROM courses_module
+    """,
+    """
+    INSERT INTO courses_search_index (rowid, kind, object_id, course_id, title, body)
+    SELECT l.id * 3 + 2, 'lesson', l.id, m.course_id, l.title, l.content
+    FROM courses_lesson l JOIN courses_module m ON m.id = l.module_id
+    """,
+]
+
+
+def _fts5_supported(schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return False
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("PRAGMA compile_options")
+        return any(row[0] == "ENABLE_FTS5" for row in cursor.fetchall())
+
+
+def create_index(apps, schema_editor):
+    # Without FTS5, courses.search falls back to its in-memory backend.
+    if not _fts5_supported(schema_editor):
+        return
+    schema_editor.execute(CREATE)
+    for statement in POPULATE:
+        schema_editor.execute(statement)
+
+
+def drop_index(apps, schema_editor):
+    if schema_editor.connection.vendor == "sqlite":
+        schema_editor.execute("DROP TABLE IF EXISTS courses_search_index")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("courses", "0014_lessonprogress_completed_at"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.5 on 2026-10-18 19:20
+
+import hashlib
+
+from django.db import migrations, models
+
+
+def backfill_summaries(apps, schema_editor):
+    Lesson = apps.get_model("courses", "Lesson")
+    batch = []
+    for lesson in Lesson.objects.only("id", "content").iterator(chunk_size=500):
+        lesson.content_length = len(lesson.content)
+        lesson.content_hash = hashlib.sha256(lesson.content.encode()).hexdigest()
+        batch.append(lesson)
+        if len(batch) == 500:
+            Lesson.objects.bulk_update(batch, ["content_length", "content_hash"])
+            batch = []
+    Lesson.objects.bulk_update(batch, ["content_length", "content_hash"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("courses", "0015_search_index"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="lesson",
+            name="content_hash",
+            field=models.CharField(blank=True, editable=False, max_length=64),
+        ),
+        migrations.AddField(
+            model_name="lesson",
+            name="content_length",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_summaries, migrations.RunPython.noop),
+    ]
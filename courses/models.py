@@ -1,7 +1,25 @@
+import hashlib
+
 from django.db import models
+from django.utils import timezone
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
 from django.conf import settings
 User = settings.AUTH_USER_MODEL
 
+class CourseQuerySet(models.QuerySet):
+    def with_enrolled_count(self):
+        # A correlated subquery rather than Count('students') so the count
+        # stays right when the queryset is itself filtered on students.
+        enrolled = (
+            Enrollment.objects.filter(course_id=OuterRef('pk'))
+            .order_by()
+            .values('course_id')
+            .annotate(n=Count('*'))
+            .values('n')
+        )
+        return self.annotate(enrolled_count=Coalesce(Subquery(enrolled), 0))
+
 class Course(models.Model):
     title = models.CharField(max_length=200)
     description = models.TextField(blank=True)
@@ -12,14 +30,54 @@ class Course(models.Model):
     )
     students = models.ManyToManyField(
         User, 
+        through='Enrollment',
         related_name="enrolled_courses", 
         blank=True
     )
     created_at = models.DateTimeField(auto_now_add=True)
+    lesson_count = models.PositiveIntegerField(default=0, editable=False)
+    # Bumped on every write to the course's content, see courses.tree.
+    content_version = models.PositiveIntegerField(default=0, editable=False)
+    # Review rating counters, maintained by reviews.ratings.
+    rating_count = models.PositiveIntegerField(default=0, editable=False)
+    rating_sum = models.PositiveIntegerField(default=0, editable=False)
+    rating_1 = models.PositiveIntegerField(default=0, editable=False)
+    rating_2 = models.PositiveIntegerField(default=0, editable=False)
+    rating_3 = models.PositiveIntegerField(default=0, editable=False)
+    rating_4 = models.PositiveIntegerField(default=0, editable=False)
+    rating_5 = models.PositiveIntegerField(default=0, editable=False)
+
+    objects = CourseQuerySet.as_manager()
+
+    class Meta:
+        indexes = [models.Index(fields=['created_at', 'id'], name='course_created_id_idx')]
 
     def __str__(self):
         return self.title
 
+class Enrollment(models.Model):
+    """Membership only; progress and activity live on EnrollmentProgress."""
+    student = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='enrollments')
+    course = models.ForeignKey(
+        'Course',
+        on_delete=models.CASCADE,
+        related_name='enrollments')
+    enrolled_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        # (student, course) serves "my courses" lookups straight from the
+        # index; the course-first index serves rosters and enrolled counts.
+        constraints = [
+            models.UniqueConstraint(fields=['student', 'course'], name='unique_enrollment_student_course')
+        ]
+        indexes = [models.Index(fields=['course', 'student'], name='enrollment_course_student_idx')]
+
+    def __str__(self):
+        return f"{self.student}-{self.course}"
+
 class Module(models.Model):
     course = models.ForeignKey(
         'Course',
@@ -32,6 +90,9 @@ class Module(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [models.Index(fields=['course', 'order', 'id'], name='module_course_order_idx')]
+
 
 class Lesson(models.Model):
     module = models.ForeignKey(
@@ -42,14 +103,33 @@ class Lesson(models.Model):
     order = models.PositiveIntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # Describe the body so lesson lists can leave it out, see save().
+    content_length = models.PositiveIntegerField(default=0, editable=False)
+    content_hash = models.CharField(max_length=64, blank=True, editable=False)
 
 
     class Meta:
         ordering = ['order', 'id']
+        indexes = [models.Index(fields=['module', 'order', 'id'], name='lesson_module_order_idx')]
 
 
     def __str__(self):
         return f"{self.module.title} · {self.title}"
+
+    @staticmethod
+    def hash_content(content):
+        return hashlib.sha256(content.encode()).hexdigest()
+
+    def save(self, *args, **kwargs):
+        # Skip when content was deferred and not assigned: the stored
+        # summary is still right and reading it would cost a query.
+        if 'content' in self.__dict__:
+            self.content_length = len(self.content)
+            self.content_hash = self.hash_content(self.content)
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None and 'content' in update_fields:
+                kwargs['update_fields'] = {*update_fields, 'content_length', 'content_hash'}
+        super().save(*args, **kwargs)
     
 class Quiz(models.Model):
     lesson = models.ForeignKey(
@@ -59,6 +139,8 @@ class Quiz(models.Model):
     title = models.CharField(max_length=200)
     description=models.TextField(blank=True)
     time_limit= models.IntegerField(help_text='Time limit in minutes', null=True, blank=True)
+    # Bumped on every Question write so cached answer keys can't go stale.
+    answer_key_version = models.PositiveIntegerField(default=0, editable=False)
 
 class Question(models.Model):
     quiz = models.ForeignKey(
@@ -126,7 +208,9 @@ class LessonProgress(models.Model):
         on_delete=models.CASCADE, 
         related_name='progress')
     completed = models.BooleanField(default=False)
-    completed_at = models.DateTimeField(auto_now_add=True)
+    # Not auto_now_add: batched ingestion records when an offline client
+    # actually completed the lesson.
+    completed_at = models.DateTimeField(default=timezone.now)
 
     class Meta:
         unique_together = ('student', 'lesson')
@@ -134,6 +218,26 @@ class LessonProgress(models.Model):
     def __str__(self):
         return f"{self.student}-{self.lesson}-{self.completed}"
     
+class EnrollmentProgress(models.Model):
+    """Denormalized per-enrollment progress counters, see courses.progress."""
+    student = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='enrollment_progress')
+    course = models.ForeignKey(
+        'Course',
+        on_delete=models.CASCADE,
+        related_name='enrollment_progress')
+    completed_lessons = models.PositiveIntegerField(default=0)
+    total_lessons = models.PositiveIntegerField(default=0)
+    last_activity = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        unique_together = ('student', 'course')
+
+    def __str__(self):
+        return f"{self.student}-{self.course}-{self.completed_lessons}/{self.total_lessons}"
+
 class Certificate(models.Model):
     course = models.ForeignKey('Course', on_delete=models.CASCADE, related_name='certificates')
     student = models.ForeignKey(User, on_delete=models.CASCADE, related_name='certificates')
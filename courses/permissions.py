@@ -1,5 +1,8 @@
+from django.db.models import F
 from rest_framework.permissions import BasePermission, SAFE_METHODS
 
+from .models import Course, Module, Lesson
+
 class IsAdminOrTeacher(BasePermission):
     def has_permission(self, request, view):
         return (
@@ -18,12 +21,47 @@ class IsCourseTeacherOrReadOnly(BasePermission):
     def has_object_permission(self, request, view, obj):
         if request.method in SAFE_METHODS:
             return True
-        
-        course = None
-        if hasattr(obj,'course'):
-            course = obj.course
+        return is_course_teacher(request, obj)
+
+
+# Path from each course content model to its course's teacher and course id.
+_OWNER_PATHS = {
+    Course: ('teacher_id', 'id'),
+    Module: ('course__teacher_id', 'course_id'),
+    Lesson: ('module__course__teacher_id', 'module__course_id'),
+}
+
+
+def with_course_owner(queryset):
+    """Annotate ``course_teacher_id`` and ``owner_course_id`` onto a Module
+    or Lesson queryset, so ownership checks on its rows cost no query."""
+    teacher_path, course_path = _OWNER_PATHS[queryset.model]
+    return queryset.annotate(course_teacher_id=F(teacher_path), owner_course_id=F(course_path))
+
+
+def course_owner(request, obj):
+    """(teacher_id, course_id) of the course owning ``obj``.
+
+    Uses the with_course_owner annotations when present; otherwise walks
+    the chain in one values query, memoized on the request.
+    """
+    if hasattr(obj, 'course_teacher_id'):
+        return obj.course_teacher_id, obj.owner_course_id
+    if isinstance(obj, Course):
+        return obj.teacher_id, obj.id
+
+    memo = getattr(request, '_course_owner_memo', None)
+    if memo is None:
+        memo = request._course_owner_memo = {}
+    key = (type(obj), obj.pk)
+    if key not in memo:
+        memo[key] = (
+            type(obj).objects.filter(pk=obj.pk).values_list(*_OWNER_PATHS[type(obj)]).first()
+            or (None, None)
+        )
+    return memo[key]
 
-        elif  hasattr(obj, 'module'):
-            course= obj.module.course
 
-        return bool(course and request.user == getattr(course,'teacher',None))
\ No newline at end of file
+def is_course_teacher(request, obj):
+    user = request.user
+    return bool(user and user.is_authenticated and course_owner(request, obj)[0] == user.id)
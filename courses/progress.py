@@ -0,0 +1,252 @@
+from django.db import transaction
+from django.db.models import Case, Count, F, Max, Q, Value, When
+from django.utils import timezone
+
+from .models import Course, Enrollment, EnrollmentProgress, Lesson, LessonProgress
+
+
+def _percent(completed, total):
+    percent = (completed / total * 100) if total > 0 else 0
+    return round(percent, 2)
+
+
+def student_progress(student_id):
+    """Progress of one student across every enrolled course.
+
+    Reads the maintained EnrollmentProgress counters, so this is a single
+    query no matter how many courses or completed lessons the student has.
+    """
+    rows = (
+        EnrollmentProgress.objects.filter(student_id=student_id)
+        .order_by('course_id')
+        .values_list('course_id', 'course__title', 'total_lessons', 'completed_lessons')
+    )
+    return [
+        {
+            'course_id': course_id,
+            'course_title': title,
+            'total_lessons': total,
+            'completed_lessons': completed,
+            'progress_percent': _percent(completed, total),
+        }
+        for course_id, title, total, completed in rows
+    ]
+
+
+def course_progress(course_id):
+    """Progress of every student enrolled in one course, in a single query."""
+    rows = (
+        EnrollmentProgress.objects.filter(course_id=course_id)
+        .order_by('student_id')
+        .values_list('student_id', 'student__username', 'total_lessons', 'completed_lessons')
+    )
+    return [
+        {
+            'student_id': student_id,
+            'student_name': username,
+            'total_lessons': total,
+            'completed_lessons': completed,
+            'progress_percent': _percent(completed, total),
+        }
+        for student_id, username, total, completed in rows
+    ]
+
+
+# Counter maintenance. Every helper below must run in the same transaction
+# as the write it accounts for, so callers wrap both in transaction.atomic().
+
+def enrollments_added(course_id, student_ids):
+    """Create counter rows for newly enrolled students."""
+    course = Course.objects.only('lesson_count').get(pk=course_id)
+    completed = _completed_by_student(course_id, student_ids)
+    EnrollmentProgress.objects.bulk_create(
+        [
+            EnrollmentProgress(
+                course_id=course_id,
+                student_id=student_id,
+                total_lessons=course.lesson_count,
+                completed_lessons=completed.get(student_id, (0, None))[0],
+                last_activity=completed.get(student_id, (0, None))[1],
+            )
+            for student_id in student_ids
+        ],
+        ignore_conflicts=True,
+    )
+
+
+def enrollments_removed(course_id, student_ids):
+    EnrollmentProgress.objects.filter(course_id=course_id, student_id__in=student_ids).delete()
+
+
+def lessons_added(course_id, count=1):
+    Course.objects.filter(pk=course_id).update(lesson_count=F('lesson_count') + count)
+    EnrollmentProgress.objects.filter(course_id=course_id).update(
+        total_lessons=F('total_lessons') + count
+    )
+
+
+def lessons_removed(course_id, lesson_ids):
+    """Account for lessons about to be deleted.
+
+    Must be called before the delete, while the cascaded LessonProgress
+    rows still exist to tell us whose completed count goes down.
+    """
+    lesson_ids = list(lesson_ids)
+    if not lesson_ids:
+        return
+    per_student = (
+        LessonProgress.objects.filter(lesson_id__in=lesson_ids, completed=True)
+        .values_list('student_id')
+        .annotate(n=Count('id'))
+        .order_by()
+    )
+    # One UPDATE per distinct decrement, which is bounded by len(lesson_ids).
+    by_amount = {}
+    for student_id, n in per_student:
+        by_amount.setdefault(n, []).append(student_id)
+    for n, student_ids in by_amount.items():
+        EnrollmentProgress.objects.filter(course_id=course_id, student_id__in=student_ids).update(
+            completed_lessons=F('completed_lessons') - n
+        )
+
+    count = len(lesson_ids)
+    Course.objects.filter(pk=course_id).update(lesson_count=F('lesson_count') - count)
+    EnrollmentProgress.objects.filter(course_id=course_id).update(
+        total_lessons=F('total_lessons') - count
+    )
+
+
+def record_completion(student_id, lesson):
+    """Mark one lesson completed now; see record_completions."""
+    return record_completions(student_id, {lesson.id: timezone.now()})
+
+
+def _latest(field, value):
+    """Set ``field`` to ``value`` unless it already holds a later time."""
+    return Case(When(Q(**{f'{field}__gte': value}), then=F(field)), default=Value(value))
+
+
+def record_completions(student_id, completions):
+    """Upsert many lesson completions for one student in a single INSERT.
+
+    ``completions`` maps lesson id -> completion time, already deduplicated.
+    Lessons outside the student's enrolled courses are skipped. Returns the
+    ids of lessons that were not completed before, which are the only ones
+    that move the counters.
+    """
+    course_of = dict(
+        Lesson.objects.filter(pk__in=completions, module__course__enrollments__student_id=student_id)
+        .values_list('id', 'module__course_id')
+    )
+    if not course_of:
+        return []
+
+    with transaction.atomic():
+        # Lock this student's counter rows first so concurrent batches
+        # touching the same courses can't both count a lesson as new.
+        list(
+            EnrollmentProgress.objects.select_for_update()
+            .filter(student_id=student_id, course_id__in=set(course_of.values()))
+            .values_list('id')
+        )
+        done = set(
+            LessonProgress.objects.filter(student_id=student_id, lesson_id__in=course_of, completed=True)
+            .values_list('lesson_id', flat=True)
+        )
+        new = {lesson_id: completions[lesson_id] for lesson_id in course_of if lesson_id not in done}
+        LessonProgress.objects.bulk_create(
+            [
+                LessonProgress(student_id=student_id, lesson_id=lesson_id, completed=True, completed_at=at)
+                for lesson_id, at in new.items()
+            ],
+            update_conflicts=True,
+            unique_fields=['student', 'lesson'],
+            update_fields=['completed', 'completed_at'],
+        )
+
+        per_course = {}
+        for lesson_id, at in new.items():
+            n, latest = per_course.get(course_of[lesson_id], (0, at))
+            per_course[course_of[lesson_id]] = (n + 1, max(latest, at))
+        for course_id, (n, latest) in per_course.items():
+            EnrollmentProgress.objects.filter(student_id=student_id, course_id=course_id).update(
+                completed_lessons=F('completed_lessons') + n,
+                last_activity=_latest('last_activity', latest),
+            )
+    return sorted(new)
+
+
+def _completed_by_student(course_id, student_ids=None):
+    qs = LessonProgress.objects.filter(lesson__module__course_id=course_id, completed=True)
+    if student_ids is not None:
+        qs = qs.filter(student_id__in=student_ids)
+    return {
+        student_id: (n, last)
+        for student_id, n, last in qs.values_list('student_id')
+        .annotate(n=Count('id'), last=Max('completed_at'))
+        .order_by()
+    }
+
+
+def rebuild_counters(course_ids=None, fix=True):
+    """Recompute every counter from ground truth and report drift.
+
+    Returns a list of human readable drift descriptions. When ``fix`` is
+    true, drifted, missing and orphaned rows are repaired in place.
+    """
+    courses = Course.objects.annotate(actual=Count('modules__lessons', distinct=True))
+    if course_ids is not None:
+        courses = courses.filter(pk__in=course_ids)
+
+    drift = []
+    for course in courses.order_by('id'):
+        with transaction.atomic():
+            drift.extend(_rebuild_course(course, fix))
+    return drift
+
+
+def _rebuild_course(course, fix):
+    drift = []
+    if course.lesson_count != course.actual:
+        drift.append(f"course {course.id}: lesson_count {course.lesson_count} != {course.actual}")
+        if fix:
+            Course.objects.filter(pk=course.id).update(lesson_count=course.actual)
+
+    enrolled = set(
+        Enrollment.objects.filter(course_id=course.id).values_list('student_id', flat=True)
+    )
+    completed = _completed_by_student(course.id)
+    existing = {
+        row.student_id: row
+        for row in EnrollmentProgress.objects.filter(course_id=course.id).select_for_update()
+    }
+
+    to_create, to_update = [], []
+    for student_id in enrolled:
+        n, last = completed.get(student_id, (0, None))
+        row = existing.get(student_id)
+        if row is None:
+            drift.append(f"course {course.id}: missing row for student {student_id}")
+            to_create.append(EnrollmentProgress(
+                course_id=course.id, student_id=student_id,
+                total_lessons=course.actual, completed_lessons=n, last_activity=last,
+            ))
+        elif (row.total_lessons, row.completed_lessons) != (course.actual, n):
+            drift.append(
+                f"course {course.id}: student {student_id} has "
+                f"{row.completed_lessons}/{row.total_lessons}, expected {n}/{course.actual}"
+            )
+            row.total_lessons, row.completed_lessons, row.last_activity = course.actual, n, last
+            to_update.append(row)
+
+    orphaned = set(existing) - enrolled
+    for student_id in sorted(orphaned):
+        drift.append(f"course {course.id}: orphaned row for student {student_id}")
+
+    if fix:
+        EnrollmentProgress.objects.bulk_create(to_create)
+        EnrollmentProgress.objects.bulk_update(
+            to_update, ['total_lessons', 'completed_lessons', 'last_activity']
+        )
+        EnrollmentProgress.objects.filter(course_id=course.id, student_id__in=orphaned).delete()
+    return drift
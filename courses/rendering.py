@@ -0,0 +1,123 @@
+import hashlib
+import json
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connection, transaction
+from django.db.models import Q
+
+from .certificate_pdf import TEMPLATE_VERSION, render_certificate_pdf
+from .models import Certificate
+
+logger = logging.getLogger(__name__)
+
+_config = getattr(settings, 'CERTIFICATE_RENDERING', {})
+BATCH_SIZE = _config.get('BATCH_SIZE', 1000)
+# Batches with fewer new documents than this render in-process: starting
+# a spawn pool costs far more than rendering a handful of PDFs.
+POOL_THRESHOLD = _config.get('POOL_THRESHOLD', 64)
+UPDATE_BATCH_SIZE = 100
+
+# Rendering runs off the request path on this thread, which in turn feeds
+# the process pool; web workers only queue work.
+_background = ThreadPoolExecutor(max_workers=1, thread_name_prefix='certificates')
+
+
+def certificate_inputs(student_name, course_title, issued_at):
+    """Everything that appears on the document, and nothing else."""
+    return {'student': student_name, 'course': course_title, 'issued_on': issued_at.date().isoformat()}
+
+
+def content_key(inputs):
+    payload = json.dumps({'template': TEMPLATE_VERSION, **inputs}, sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def storage_name(key):
+    return f'certificates/{key[:2]}/{key}.pdf'
+
+
+def render_pending(course_ids=None, workers=None):
+    """Render and attach files for certificates that have none yet.
+
+    Certificates are keyed by a hash of the template version and their
+    inputs; each distinct key is rendered at most once (and not at all if
+    storage already holds it). A process pool of ``workers`` processes is
+    started only once a batch has POOL_THRESHOLD documents to render, and
+    is reused for the rest of the run; ``workers=0`` always renders in
+    this process. Returns the number of documents rendered.
+    """
+    workers = _config.get('WORKERS') if workers is None else workers
+    queryset = Certificate.objects.filter(Q(file='') | Q(file__isnull=True)).order_by('id')
+    if course_ids is not None:
+        queryset = queryset.filter(course_id__in=course_ids)
+
+    pool = None
+
+    def get_pool(size):
+        nonlocal pool
+        if pool is None and workers != 0 and size >= POOL_THRESHOLD:
+            pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+        return pool
+
+    rendered, last_id = 0, 0
+    try:
+        while True:
+            batch = list(
+                queryset.filter(id__gt=last_id)
+                .select_related('student', 'course')
+                .only('id', 'file', 'issued_at', 'student__username', 'student__first_name',
+                      'student__last_name', 'course__title')[:BATCH_SIZE]
+            )
+            if not batch:
+                return rendered
+            last_id = batch[-1].id
+            rendered += _render_batch(batch, get_pool)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+
+def _render_batch(batch, get_pool):
+    inputs = {}
+    for certificate in batch:
+        student = certificate.student
+        data = certificate_inputs(
+            student.get_full_name() or student.username, certificate.course.title, certificate.issued_at
+        )
+        key = content_key(data)
+        inputs[key] = data
+        certificate.file.name = storage_name(key)
+
+    missing = [key for key in inputs if not default_storage.exists(storage_name(key))]
+    pool = get_pool(len(missing))
+    if pool is not None:
+        documents = pool.map(render_certificate_pdf, [inputs[k] for k in missing], chunksize=32)
+    else:
+        documents = map(render_certificate_pdf, [inputs[k] for k in missing])
+    for key, document in zip(missing, documents):
+        saved = default_storage.save(storage_name(key), ContentFile(document))
+        if saved != storage_name(key):
+            # Another run stored the same content first; keep theirs.
+            default_storage.delete(saved)
+
+    Certificate.objects.bulk_update(batch, ['file'], batch_size=UPDATE_BATCH_SIZE)
+    return len(missing)
+
+
+def _render_in_background(course_ids):
+    try:
+        render_pending(course_ids)
+    except Exception:
+        logger.exception("Rendering certificates for courses %s failed", course_ids)
+    finally:
+        connection.close()
+
+
+def schedule_rendering(course_ids):
+    """Render new certificates for these courses after the current transaction commits."""
+    transaction.on_commit(lambda: _background.submit(_render_in_background, list(course_ids)))
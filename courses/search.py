@@ -0,0 +1,359 @@
+"""Ranked full-text search over courses, modules and lessons.
+
+Two interchangeable backends keep an inverted index of
+Course.title/description, Module.title/description and
+Lesson.title/content:
+
+* ``FTS5Backend`` stores it in an SQLite FTS5 virtual table created by
+  migration 0015. Index writes share the transaction of the row they
+  describe.
+* ``MemoryBackend`` is a pure-Python BM25 index for databases without
+  FTS5. It is built lazily per process, patched on commit by writes in
+  that process, and fully rebuilt every ``max_age`` seconds to pick up
+  writes from other processes.
+
+The index is maintained from post_save/post_delete signals, and hits
+whose rows have disappeared anyway are dropped at query time.
+"""
+import html
+import math
+import re
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models.signals import post_delete, post_save
+
+from .models import Course, Lesson, Module
+
+TABLE = 'courses_search_index'
+KINDS = ('course', 'module', 'lesson')
+# Title matches count this many times more than body matches.
+TITLE_WEIGHT = 5.0
+SNIPPET_TOKENS = 12
+
+# Private-use markers survive HTML escaping and become <mark> afterwards,
+# so highlighted snippets are safe to render as HTML.
+_OPEN, _CLOSE = '', ''
+_WORD = re.compile(r'\w+', re.UNICODE)
+
+
+def tokenize(text):
+    return [token.lower() for token in _WORD.findall(text or '')]
+
+
+def _highlighted(text):
+    return html.escape(text).replace(_OPEN, '<mark>').replace(_CLOSE, '</mark>')
+
+
+def _rowid(kind, object_id):
+    return object_id * len(KINDS) + KINDS.index(kind)
+
+
+def _documents(kind, queryset):
+    """(kind, id, course_id, title, body) tuples for a queryset of one kind."""
+    if kind == 'course':
+        rows = queryset.values_list('id', 'id', 'title', 'description')
+    elif kind == 'module':
+        rows = queryset.values_list('id', 'course_id', 'title', 'description')
+    else:
+        rows = queryset.values_list('id', 'module__course_id', 'title', 'content')
+    for object_id, course_id, title, body in rows.iterator(chunk_size=1000):
+        yield kind, object_id, course_id, title, body or ''
+
+
+def all_documents():
+    yield from _documents('course', Course.objects.order_by('id'))
+    yield from _documents('module', Module.objects.order_by('id'))
+    yield from _documents('lesson', Lesson.objects.order_by('id'))
+
+
+class FTS5Backend:
+    def upsert(self, documents):
+        with connection.cursor() as cursor:
+            for kind, object_id, course_id, title, body in documents:
+                rowid = _rowid(kind, object_id)
+                cursor.execute(f'DELETE FROM {TABLE} WHERE rowid = %s', [rowid])
+                cursor.execute(
+                    f'INSERT INTO {TABLE} (rowid, kind, object_id, course_id, title, body) '
+                    f'VALUES (%s, %s, %s, %s, %s, %s)',
+                    [rowid, kind, object_id, course_id, title, body],
+                )
+
+    def remove(self, kind, object_ids):
+        with connection.cursor() as cursor:
+            for object_id in object_ids:
+                cursor.execute(f'DELETE FROM {TABLE} WHERE rowid = %s', [_rowid(kind, object_id)])
+
+    def rebuild(self):
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {TABLE}')
+            self.upsert(all_documents())
+
+    def search(self, terms, kind=None, limit=50, offset=0):
+        # Every term must match; the last one also matches as a prefix
+        # so results appear while the user is still typing.
+        match = ' '.join(f'"{term}"' for term in terms[:-1])
+        match = f'{match} "{terms[-1]}"*'.strip()
+        sql = (
+            f'SELECT kind, object_id, course_id, '
+            f"highlight({TABLE}, 3, %s, %s), snippet({TABLE}, 4, %s, %s, '…', {SNIPPET_TOKENS}), "
+            f'bm25({TABLE}, 0, 0, 0, {TITLE_WEIGHT}, 1.0) AS rank '
+            f'FROM {TABLE} WHERE {TABLE} MATCH %s'
+        )
+        params = [_OPEN, _CLOSE, _OPEN, _CLOSE, match]
+        if kind:
+            sql += ' AND kind = %s'
+            params.append(kind)
+        sql += ' ORDER BY rank LIMIT %s OFFSET %s'
+        params += [limit, offset]
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return [
+                _result(kind, object_id, course_id, title, snippet, -rank)
+                for kind, object_id, course_id, title, snippet, rank in cursor.fetchall()
+            ]
+
+
+class MemoryBackend:
+    """Process-local BM25 inverted index."""
+
+    k1, b = 1.2, 0.75
+
+    def __init__(self, max_age=300):
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._built_at = None
+        self._docs = {}
+        self._postings = {}
+
+    def _ensure_built(self):
+        if self._built_at is None or time.monotonic() - self._built_at > self.max_age:
+            self.rebuild()
+
+    def rebuild(self):
+        docs, postings = {}, {}
+        for document in all_documents():
+            self._add(docs, postings, document)
+        with self._lock:
+            self._docs, self._postings = docs, postings
+            self._built_at = time.monotonic()
+
+    def _add(self, docs, postings, document):
+        kind, object_id, course_id, title, body = document
+        key = (kind, object_id)
+        title_tokens, body_tokens = tokenize(title), tokenize(body)
+        weights = Counter(body_tokens)
+        for token in title_tokens:
+            weights[token] += TITLE_WEIGHT
+        docs[key] = (course_id, title, body, sum(weights.values()), list(weights))
+        for token, weight in weights.items():
+            postings.setdefault(token, {})[key] = weight
+
+    def _discard(self, key):
+        doc = self._docs.pop(key, None)
+        if doc is not None:
+            for token in doc[4]:
+                self._postings[token].pop(key, None)
+                if not self._postings[token]:
+                    del self._postings[token]
+
+    def upsert(self, documents):
+        documents = list(documents)
+
+        def apply():
+            with self._lock:
+                if self._built_at is None:
+                    return  # not built yet; the first search loads everything
+                for document in documents:
+                    self._discard((document[0], document[1]))
+                    self._add(self._docs, self._postings, document)
+
+        transaction.on_commit(apply)
+
+    def remove(self, kind, object_ids):
+        object_ids = list(object_ids)
+
+        def apply():
+            with self._lock:
+                for object_id in object_ids:
+                    self._discard((kind, object_id))
+
+        transaction.on_commit(apply)
+
+    def search(self, terms, kind=None, limit=50, offset=0):
+        self._ensure_built()
+        with self._lock:
+            candidates = None
+            per_term = []
+            for i, term in enumerate(terms):
+                tokens = [term]
+                if i == len(terms) - 1:
+                    tokens = [token for token in self._postings if token.startswith(term)]
+                matches = {}
+                for token in tokens:
+                    for key, weight in self._postings.get(token, {}).items():
+                        matches[key] = matches.get(key, 0) + weight
+                per_term.append(matches)
+                candidates = set(matches) if candidates is None else candidates & set(matches)
+
+            if kind:
+                candidates = {key for key in candidates if key[0] == kind}
+            total = len(self._docs) or 1
+            avg_length = sum(doc[3] for doc in self._docs.values()) / total
+            scored = []
+            for key in candidates:
+                length = self._docs[key][3]
+                score = 0.0
+                for matches in per_term:
+                    idf = math.log(1 + (total - len(matches) + 0.5) / (len(matches) + 0.5))
+                    tf = matches[key]
+                    score += idf * tf * (self.k1 + 1) / (tf + self.k1 * (1 - self.b + self.b * length / avg_length))
+                scored.append((score, key))
+            scored.sort(key=lambda item: (-item[0], item[1]))
+            page = [(score, key, self._docs[key]) for score, key in scored[offset:offset + limit]]
+
+        return [
+            _result(
+                key[0], key[1], doc[0], _mark(doc[1], terms, whole=True), _mark(doc[2], terms), score
+            )
+            for score, key, doc in page
+        ]
+
+
+def _mark(text, terms, whole=False):
+    """Wrap matching words in markers; unless ``whole``, cut a window around the first one."""
+    prefix = terms[-1]
+    exact = set(terms[:-1])
+
+    def matches(word):
+        word = word.lower()
+        return word in exact or word.startswith(prefix)
+
+    words = list(_WORD.finditer(text))
+    if whole:
+        start, end = 0, len(text)
+    else:
+        if not words:
+            return ''
+        first = next((i for i, m in enumerate(words) if matches(m.group())), 0)
+        lo = max(min(first - SNIPPET_TOKENS // 2, len(words) - SNIPPET_TOKENS), 0)
+        hi = min(lo + SNIPPET_TOKENS, len(words))
+        start = words[lo].start() if lo else 0
+        end = words[hi - 1].end() if hi < len(words) else len(text)
+    out, position = [], start
+    for match in words:
+        if match.start() < start or match.end() > end:
+            continue
+        out.append(text[position:match.start()])
+        word = match.group()
+        out.append(f'{_OPEN}{word}{_CLOSE}' if matches(word) else word)
+        position = match.end()
+    out.append(text[position:end])
+    snippet = ''.join(out)
+    if not whole:
+        snippet = ('…' if start > 0 else '') + snippet + ('…' if end < len(text) else '')
+    return snippet
+
+
+def _result(kind, object_id, course_id, title, snippet, score):
+    return {
+        'type': kind,
+        'id': object_id,
+        'course_id': course_id,
+        'title': _highlighted(title),
+        'snippet': _highlighted(snippet),
+        'score': round(score, 4),
+    }
+
+
+def _fts5_available():
+    if connection.vendor != 'sqlite':
+        return False
+    return TABLE in connection.introspection.table_names(include_views=True)
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                config = getattr(settings, 'SEARCH', {})
+                choice = config.get('BACKEND', 'auto')
+                if choice == 'fts5' or (choice == 'auto' and _fts5_available()):
+                    _backend = FTS5Backend()
+                else:
+                    _backend = MemoryBackend(max_age=config.get('MAX_AGE', 300))
+    return _backend
+
+
+MODELS = {'course': Course, 'module': Module, 'lesson': Lesson}
+
+
+def _drop_missing(results):
+    """Remove hits whose rows are gone, and forget them in the index.
+
+    Signals below keep the index current for ORM saves and deletes, but
+    queryset.update(), raw SQL and the like bypass them; a public search
+    must still never show deleted content.
+    """
+    ids = {}
+    for result in results:
+        ids.setdefault(result['type'], set()).add(result['id'])
+    missing = {}
+    for kind, object_ids in ids.items():
+        existing = set(MODELS[kind].objects.filter(pk__in=object_ids).values_list('pk', flat=True))
+        if object_ids - existing:
+            missing[kind] = object_ids - existing
+            get_backend().remove(kind, missing[kind])
+    return [r for r in results if r['id'] not in missing.get(r['type'], ())]
+
+
+def search(query, kind=None, limit=50, offset=0):
+    terms = tokenize(query)
+    if not terms:
+        return []
+    return _drop_missing(get_backend().search(terms, kind=kind, limit=limit, offset=offset))
+
+
+# The index follows every ORM save and delete, including cascades (e.g.
+# deleting a teacher), the admin and the shell. Connected in CoursesConfig.ready().
+
+def _indexed_fields_saved(update_fields, body_field):
+    return update_fields is None or bool({'title', body_field} & set(update_fields))
+
+
+def course_saved(sender, instance, update_fields=None, **kwargs):
+    if _indexed_fields_saved(update_fields, 'description'):
+        get_backend().upsert([('course', instance.pk, instance.pk, instance.title, instance.description)])
+
+
+def module_saved(sender, instance, update_fields=None, **kwargs):
+    if _indexed_fields_saved(update_fields, 'description'):
+        get_backend().upsert(
+            [('module', instance.pk, instance.course_id, instance.title, instance.description)]
+        )
+
+
+def lesson_saved(sender, instance, update_fields=None, **kwargs):
+    if _indexed_fields_saved(update_fields, 'content'):
+        # Views annotate owner_course_id; otherwise the module is usually cached.
+        course_id = getattr(instance, 'owner_course_id', None) or instance.module.course_id
+        get_backend().upsert([('lesson', instance.pk, course_id, instance.title, instance.content)])
+
+
+def row_deleted(sender, instance, **kwargs):
+    kind = next(k for k, model in MODELS.items() if model is sender)
+    get_backend().remove(kind, [instance.pk])
+
+
+def connect_signals():
+    for model, handler in ((Course, course_saved), (Module, module_saved), (Lesson, lesson_saved)):
+        post_save.connect(handler, sender=model, dispatch_uid=f'search-{model.__name__}-saved')
+        post_delete.connect(row_deleted, sender=model, dispatch_uid=f'search-{model.__name__}-deleted')
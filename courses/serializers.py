@@ -9,11 +9,39 @@ class CourseSerializer(serializers.ModelSerializer):
         queryset=User.objects.filter(role="teacher"),  # sirf teachers allowed
         required=False
     )
+    enrolled_count = serializers.SerializerMethodField()
+    rating = serializers.SerializerMethodField()
 
     class Meta:
         model = Course
-        fields = ['id', 'title', 'description', 'teacher', 'students', 'created_at']
-        read_only_fields = ['students', 'created_at']
+        fields = ['id', 'title', 'description', 'teacher', 'enrolled_count', 'rating', 'created_at']
+        read_only_fields = ['created_at']
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # The full roster is opt-in (?expand=students); it lives at courses/<id>/students/.
+        if 'students' in self.context.get('expand', ()):
+            self.fields['students'] = serializers.PrimaryKeyRelatedField(many=True, read_only=True)
+
+    def get_enrolled_count(self, obj):
+        # Annotated by Course.objects.with_enrolled_count() on read paths.
+        if hasattr(obj, 'enrolled_count'):
+            return obj.enrolled_count
+        return obj.students.count()
+
+    def get_rating(self, obj):
+        # Counter columns on the course row itself (see reviews.ratings); no review query.
+        count = obj.rating_count
+        return {
+            'count': count,
+            'average': round(obj.rating_sum / count, 2) if count else None,
+            'histogram': {str(star): getattr(obj, f'rating_{star}') for star in range(1, 6)},
+        }
+
+class RosterSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = User
+        fields = ['id', 'username', 'first_name', 'last_name']
 
 class ModuleSerializer(serializers.ModelSerializer):
     class Meta:
@@ -24,10 +52,28 @@ class ModuleSerializer(serializers.ModelSerializer):
 class LessonSerializer(serializers.ModelSerializer):
     class Meta:
         model = Lesson
-        fields = ['id', 'module', 'title', 'content', 'video_url', 'order', 'created_at', 'updated_at']
+        fields = [
+            'id', 'module', 'title', 'content', 'content_length', 'content_hash',
+            'video_url', 'order', 'created_at', 'updated_at',
+        ]
         read_only_fields= ['module', 'created_at', 'updated_at']
 
 
+class LessonSummarySerializer(serializers.ModelSerializer):
+    """A lesson without its body, for tables of contents.
+
+    ``content_hash`` lets clients tell whether a body they already fetched
+    from the lesson detail endpoint is still current.
+    """
+    class Meta:
+        model = Lesson
+        fields = [
+            'id', 'module', 'title', 'content_length', 'content_hash',
+            'video_url', 'order', 'created_at', 'updated_at',
+        ]
+        read_only_fields = fields
+
+
 class QuestionSerializer(serializers.ModelSerializer):
     class Meta:
         model = Question
@@ -38,7 +84,7 @@ class QuizSerializer(serializers.ModelSerializer):
 
     class Meta:
         model=Quiz
-        fields='__all__'
+        exclude=['answer_key_version']
 
 
 class AnswerSerializer(serializers.ModelSerializer):
@@ -53,6 +99,40 @@ class QuixAttemptSerializer(serializers.ModelSerializer):
         model = QuixAttempt
         fields = ['id', 'user', 'quiz', 'score', 'completed_at', 'answers']
 
+class TreeQuestionSerializer(serializers.ModelSerializer):
+    # correct_option is deliberately left out: the tree is sent to students.
+    class Meta:
+        model = Question
+        fields = ['id', 'text', 'option_a', 'option_b', 'option_c', 'option_d']
+
+class TreeQuizSerializer(serializers.ModelSerializer):
+    questions = TreeQuestionSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = Quiz
+        fields = ['id', 'title', 'description', 'time_limit', 'questions']
+
+class TreeLessonSerializer(serializers.ModelSerializer):
+    quizzes = TreeQuizSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = Lesson
+        fields = ['id', 'title', 'content', 'video_url', 'order', 'updated_at', 'quizzes']
+
+class TreeModuleSerializer(serializers.ModelSerializer):
+    lessons = TreeLessonSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = Module
+        fields = ['id', 'title', 'description', 'order', 'updated_at', 'lessons']
+
+class CourseTreeSerializer(serializers.ModelSerializer):
+    modules = TreeModuleSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = Course
+        fields = ['id', 'title', 'description', 'teacher', 'content_version', 'modules']
+
 class CourseProgressSerializer(serializers.Serializer):
     course_id = serializers.IntegerField()
     course_title = serializers.CharField()
@@ -60,6 +140,15 @@ class CourseProgressSerializer(serializers.Serializer):
     completed_lessons = serializers.IntegerField()
     progress_percent = serializers.FloatField()
 
+class ProgressEventSerializer(serializers.Serializer):
+    lesson = serializers.IntegerField()
+    type = serializers.ChoiceField(choices=['complete', 'heartbeat'], default='complete')
+    # When the event happened on the client; offline queues send it late.
+    at = serializers.DateTimeField(required=False)
+
+class ProgressBatchSerializer(serializers.Serializer):
+    events = serializers.ListField(child=ProgressEventSerializer(), allow_empty=False, max_length=1000)
+
 class CertificateSerializer(serializers.ModelSerializer):
     class Meta:
         model = Certificate
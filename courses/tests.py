@@ -1,3 +1,865 @@
-from django.test import TestCase
+import tempfile
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils.http import http_date
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
+
+from .activity import activity_buffer
+from .certificates import eligible_students
+from .models import (
+    Answer, Certificate, Course, EnrollmentProgress, LessonProgress, Module, Lesson, Question, Quiz, QuixAttempt,
+)
+from .grading import answer_key_cache
+from . import rendering
+from .rendering import render_pending
+from .search import FTS5Backend, MemoryBackend, get_backend
+from .progress import enrollments_added, lessons_added, rebuild_counters, record_completion
+
+User = get_user_model()
+
+
+class ProgressTestMixin:
+    def setUp(self):
+        self.teacher = User.objects.create(username="teacher", role="teacher")
+        self.admin = User.objects.create(username="admin", role="admin")
+
+    def make_course(self, title, lessons=3):
+        course = Course.objects.create(title=title, teacher=self.teacher)
+        module = Module.objects.create(course=course, title=f"{title} module")
+        for i in range(lessons):
+            Lesson.objects.create(module=module, title=f"{title} lesson {i}", order=i)
+        lessons_added(course.id, lessons)
+        return course
+
+    def enroll(self, course, count, completed=1):
+        lessons = list(Lesson.objects.filter(module__course=course))
+        students = []
+        for i in range(count):
+            student = User.objects.create(username=f"{course.title}-student-{i}", role="student")
+            course.students.add(student)
+            enrollments_added(course.id, [student.id])
+            for lesson in lessons[:completed]:
+                record_completion(student.id, lesson)
+            students.append(student)
+        return students
+
+    def count_queries(self, url, user):
+        self.client.force_authenticate(user)
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries), response.json()
+
+
+
+class ProgressQueryCountTests(ProgressTestMixin, APITestCase):
+    def test_course_progress_payload(self):
+        course = self.make_course("algebra", lessons=4)
+        student, = self.enroll(course, 1, completed=1)
+
+        _, data = self.count_queries(f"/api/courses/{course.id}/progress/", self.admin)
+
+        self.assertEqual(data, [{
+            "student_id": student.id,
+            "student_name": student.username,
+            "total_lessons": 4,
+            "completed_lessons": 1,
+            "progress_percent": 25.0,
+        }])
+
+    def test_course_progress_query_count_is_constant(self):
+        small = self.make_course("small")
+        large = self.make_course("large")
+        self.enroll(small, 1)
+        self.enroll(large, 25)
+
+        small_queries, _ = self.count_queries(f"/api/courses/{small.id}/progress/", self.admin)
+        large_queries, data = self.count_queries(f"/api/courses/{large.id}/progress/", self.admin)
+
+        self.assertEqual(len(data), 25)
+        self.assertEqual(small_queries, large_queries)
+
+    def test_student_progress_query_count_is_constant(self):
+        courses = [self.make_course(f"course-{i}", lessons=2) for i in range(6)]
+        student, = self.enroll(courses[0], 1, completed=2)
+
+        few_queries, data = self.count_queries(f"/api/students/{student.id}/progress/", student)
+        self.assertEqual(data[0]["progress_percent"], 100.0)
+
+        for course in courses[1:]:
+            course.students.add(student)
+            enrollments_added(course.id, [student.id])
+        many_queries, data = self.count_queries(f"/api/students/{student.id}/progress/", student)
+
+        self.assertEqual(len(data), 6)
+        self.assertEqual([row["completed_lessons"] for row in data], [2, 0, 0, 0, 0, 0])
+        self.assertEqual(few_queries, many_queries)
+
+
+class ProgressCounterTests(ProgressTestMixin, APITestCase):
+    def counters(self, course, student):
+        row = EnrollmentProgress.objects.get(course=course, student=student)
+        return row.completed_lessons, row.total_lessons
+
+    def test_lesson_create_and_delete_update_counters(self):
+        course = self.make_course("biology", lessons=2)
+        student, = self.enroll(course, 1, completed=2)
+        module = course.modules.get()
+        self.client.force_authenticate(self.teacher)
+
+        response = self.client.post(f"/api/modules/{module.id}/lessons/", {"title": "extra"})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self.counters(course, student), (2, 3))
+
+        completed_lesson = Lesson.objects.filter(module=module).first()
+        response = self.client.delete(f"/api/lessons/{completed_lesson.id}/")
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(self.counters(course, student), (1, 2))
+        course.refresh_from_db()
+        self.assertEqual(course.lesson_count, 2)
+
+    def test_record_completion_is_idempotent(self):
+        course = self.make_course("chemistry", lessons=2)
+        student, = self.enroll(course, 1, completed=0)
+        lesson = Lesson.objects.filter(module__course=course).first()
+
+        record_completion(student.id, lesson)
+        record_completion(student.id, lesson)
+
+        self.assertEqual(self.counters(course, student), (1, 2))
+        self.assertEqual(rebuild_counters(fix=False), [])
+
+    def test_rebuild_repairs_drift(self):
+        course = self.make_course("physics", lessons=3)
+        student, = self.enroll(course, 1, completed=2)
+        EnrollmentProgress.objects.filter(course=course).update(completed_lessons=0)
+        Course.objects.filter(pk=course.pk).update(lesson_count=7)
+
+        self.assertEqual(len(rebuild_counters(fix=False)), 2)
+        rebuild_counters()
+
+        self.assertEqual(rebuild_counters(fix=False), [])
+        self.assertEqual(self.counters(course, student), (2, 3))
+
+
+class QuizSubmitTests(ProgressTestMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        answer_key_cache.clear()
+
+    def make_quiz(self, questions):
+        course = self.make_course(f"quiz-course-{questions}", lessons=1)
+        quiz = Quiz.objects.create(lesson=Lesson.objects.get(module__course=course), title="quiz")
+        Question.objects.bulk_create([
+            Question(quiz=quiz, text=f"q{i}", option_a="a", option_b="b", correct_option="A")
+            for i in range(questions)
+        ])
+        return quiz
+
+    def submit(self, quiz, answers):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post(f"/api/quizzes/{quiz.id}/submit/", {"answers": answers}, format="json")
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries), response.json()
+
+    def test_submit_scores_and_saves_answers(self):
+        quiz = self.make_quiz(3)
+        other = self.make_quiz(1)
+        a, b, c = quiz.questions.order_by("id")
+        self.client.force_authenticate(self.admin)
+
+        _, data = self.submit(quiz, [
+            {"question": a.id, "selected_option": "a"},
+            {"question": b.id, "selected_option": "B"},
+            {"question": str(c.id), "selected_option": "A"},
+            {"question": other.questions.get().id, "selected_option": "A"},
+        ])
+
+        self.assertEqual(data, {"detail": "Quiz submitted successfully.", "score": 2})
+        attempt = QuixAttempt.objects.get(quiz=quiz)
+        self.assertEqual(attempt.score, 2)
+        self.assertEqual(Answer.objects.filter(attempt=attempt).count(), 3)
+
+    def test_submit_query_count_is_constant(self):
+        small, large = self.make_quiz(2), self.make_quiz(50)
+        self.client.force_authenticate(self.admin)
+
+        small_queries, _ = self.submit(small, [
+            {"question": q.id, "selected_option": "A"} for q in small.questions.all()
+        ])
+        large_queries, data = self.submit(large, [
+            {"question": q.id, "selected_option": "A"} for q in large.questions.all()
+        ])
+
+        self.assertEqual(data["score"], 50)
+        self.assertEqual(small_queries, large_queries)
+
+    def test_answer_key_is_cached_until_questions_change(self):
+        quiz = self.make_quiz(2)
+        first, second = quiz.questions.order_by("id")
+        answers = [{"question": first.id, "selected_option": "A"}, {"question": second.id, "selected_option": "B"}]
+        self.client.force_authenticate(self.admin)
+
+        self.submit(quiz, answers)
+        with CaptureQueriesContext(connection) as ctx:
+            _, data = self.submit(quiz, answers)
+        self.assertEqual(data["score"], 1)
+        self.assertFalse(any('"courses_question"' in q["sql"] for q in ctx.captured_queries))
+        self.assertEqual(answer_key_cache.stats()["hits"], 1)
+
+        response = self.client.patch(f"/api/questions/{second.id}/", {"correct_option": "B"}, format="json")
+        self.assertEqual(response.status_code, 200)
+        _, data = self.submit(quiz, answers)
+        self.assertEqual(data["score"], 2)
+
+        response = self.client.get("/api/quizzes/answer-key-cache/")
+        self.assertEqual(response.json()["misses"], 2)
+
+    def test_results_query_count_is_constant(self):
+        small, large = self.make_quiz(2), self.make_quiz(40)
+        self.client.force_authenticate(self.admin)
+        counts = []
+        for quiz in (small, large):
+            self.submit(quiz, [{"question": q.id, "selected_option": "A"} for q in quiz.questions.all()])
+            with CaptureQueriesContext(connection) as ctx:
+                response = self.client.get(f"/api/quizzes/{quiz.id}/results/")
+            self.assertEqual(response.status_code, 200)
+            counts.append(len(ctx.captured_queries))
+
+        data = response.json()
+        self.assertEqual(len(data["answers"]), 40)
+        self.assertEqual(data["answers"][0], {"question": "q0", "selected_option": "A", "correct_option": "A"})
+        self.assertEqual(counts[0], counts[1])
+
+    def test_quiz_list_query_count_is_constant(self):
+        self.make_quiz(3)
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get("/api/quizzes/")
+        one_quiz = len(ctx.captured_queries)
+
+        for size in (4, 5, 6):
+            self.make_quiz(size)
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get("/api/quizzes/")
+
+        self.assertEqual(len(response.json()["results"]), 4)
+        self.assertEqual(len(response.json()["results"][3]["questions"]), 6)
+        self.assertEqual(len(ctx.captured_queries), one_quiz)
+
+
+class AsyncReadEndpointTests(ProgressTestMixin, APITestCase):
+    def test_async_endpoints_match_sync_endpoints(self):
+        course = self.make_course("history", lessons=2)
+        student, = self.enroll(course, 1)
+        self.make_course("geography")
+        module = course.modules.get()
+        self.client.force_authenticate(student)
+        token = str(AccessToken.for_user(student))
+
+        for path in [
+            "/courses/",
+            f"/courses/{course.id}/",
+            f"/courses/{course.id}/?expand=students",
+            f"/courses/{course.id}/modules/",
+            f"/modules/{module.id}/lessons/",
+            f"/students/{student.id}/enrollments/",
+        ]:
+            sync_response = self.client.get(f"/api{path}")
+            async_response = self.client.get(f"/api/async{path}", HTTP_AUTHORIZATION=f"Bearer {token}")
+            self.assertEqual(async_response.status_code, 200, path)
+            self.assertEqual(async_response.json(), sync_response.json(), path)
+
+    def test_async_enrollments_require_permission(self):
+        course = self.make_course("art")
+        first, second = self.enroll(course, 2)
+        token = str(AccessToken.for_user(first))
+
+        response = self.client.get(f"/api/async/students/{second.id}/enrollments/")
+        self.assertEqual(response.status_code, 401)
+        response = self.client.get(
+            f"/api/async/students/{second.id}/enrollments/", HTTP_AUTHORIZATION=f"Bearer {token}"
+        )
+        self.assertEqual(response.status_code, 403)
+        response = self.client.get("/api/async/courses/999/")
+        self.assertEqual(response.status_code, 404)
+
+
+class EnrollmentMigrationTests(TransactionTestCase):
+    before = [("courses", "0011_course_content_version"), ("accounts", "0002_user_token_version")]
+    after = [("courses", "0012_enrollment"), ("accounts", "0002_user_token_version")]
+
+    def migrate(self, targets):
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(targets)
+        return executor.loader.project_state(targets).apps
+
+    def tearDown(self):
+        self.migrate(MigrationExecutor(connection).loader.graph.leaf_nodes())
+
+    def test_existing_enrollments_survive_the_switch_to_a_through_model(self):
+        apps = self.migrate(self.before)
+        OldUser = apps.get_model("accounts", "User")
+        OldCourse = apps.get_model("courses", "Course")
+        teacher = OldUser.objects.create(username="teacher", role="teacher")
+        students = [OldUser.objects.create(username=f"s{i}", role="student") for i in range(3)]
+        first = OldCourse.objects.create(title="first", teacher=teacher)
+        second = OldCourse.objects.create(title="second", teacher=teacher)
+        first.students.add(*students)
+        second.students.add(students[0])
+
+        apps = self.migrate(self.after)
+        NewEnrollment = apps.get_model("courses", "Enrollment")
+        self.assertEqual(
+            set(NewEnrollment.objects.values_list("course_id", "student_id")),
+            {(first.id, s.id) for s in students} | {(second.id, students[0].id)},
+        )
+        self.assertFalse(NewEnrollment.objects.filter(enrolled_at__isnull=True).exists())
+        NewCourse = apps.get_model("courses", "Course")
+        self.assertEqual(NewCourse.objects.get(pk=first.id).students.count(), 3)
+
+
+class KeysetPaginationTests(ProgressTestMixin, APITestCase):
+    def test_walks_forward_and_backward(self):
+        courses = [self.make_course(f"course-{i}", lessons=0) for i in range(5)]
+        ids = [c.id for c in courses]
+
+        seen, url = [], "/api/courses/?page_size=2"
+        while url:
+            data = self.client.get(url).json()
+            seen.append([c["id"] for c in data["results"]])
+            last, url = data, data["next"]
+        self.assertEqual(seen, [ids[0:2], ids[2:4], ids[4:5]])
+
+        data = self.client.get(last["previous"]).json()
+        self.assertEqual([c["id"] for c in data["results"]], ids[2:4])
+        data = self.client.get(data["previous"]).json()
+        self.assertEqual([c["id"] for c in data["results"]], ids[0:2])
+        self.assertIsNone(data["previous"])
+
+    def test_deep_page_costs_the_same_as_first_page(self):
+        for i in range(12):
+            self.make_course(f"course-{i}", lessons=0)
+
+        with CaptureQueriesContext(connection) as first:
+            data = self.client.get("/api/courses/?page_size=3").json()
+        while data["next"]:
+            url = data["next"]
+            data = self.client.get(url).json()
+        with CaptureQueriesContext(connection) as deep:
+            self.client.get(url)
+
+        self.assertEqual(len(first.captured_queries), len(deep.captured_queries))
+        self.assertNotIn("OFFSET", deep.captured_queries[0]["sql"])
+
+    def test_invalid_cursor(self):
+        self.assertEqual(self.client.get("/api/courses/?cursor=bogus").status_code, 404)
+        self.assertEqual(self.client.get("/api/async/courses/?cursor=bogus").status_code, 404)
+
+
+class CourseListRepresentationTests(ProgressTestMixin, APITestCase):
+    def test_list_has_enrolled_count_without_roster(self):
+        course = self.make_course("music", lessons=0)
+        self.enroll(course, 3)
+
+        with CaptureQueriesContext(connection) as ctx:
+            data = self.client.get("/api/courses/").json()["results"]
+        self.assertEqual(len(ctx.captured_queries), 1)
+        self.assertEqual(data[0]["enrolled_count"], 3)
+        self.assertNotIn("students", data[0])
+
+    def test_detail_expand_and_roster(self):
+        course = self.make_course("drama", lessons=0)
+        students = self.enroll(course, 3)
+        other = self.make_course("dance", lessons=0)
+        other.students.add(students[0])
+
+        data = self.client.get(f"/api/courses/{course.id}/?expand=students").json()
+        self.assertEqual(data["students"], [s.id for s in students])
+        self.assertEqual(data["enrolled_count"], 3)
+
+        enrollments = self.client.get(f"/api/students/{students[0].id}/enrollments/")
+        self.assertEqual(enrollments.status_code, 401)
+        self.client.force_authenticate(students[0])
+        enrollments = self.client.get(f"/api/students/{students[0].id}/enrollments/").json()["results"]
+        self.assertEqual([c["enrolled_count"] for c in enrollments], [3, 1])
+
+        data = self.client.get(f"/api/courses/{course.id}/students/?page_size=2").json()
+        self.assertEqual([s["id"] for s in data["results"]], [s.id for s in students[:2]])
+        data = self.client.get(data["next"]).json()
+        self.assertEqual(data["results"], [{
+            "id": students[2].id, "username": students[2].username, "first_name": "", "last_name": "",
+        }])
+
+
+class ConditionalRequestTests(ProgressTestMixin, APITestCase):
+    def test_lesson_list_etag(self):
+        course = self.make_course("poetry", lessons=2)
+        module = course.modules.get()
+        url = f"/api/modules/{module.id}/lessons/"
+
+        response = self.client.get(url)
+        etag = response["ETag"]
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(len(ctx.captured_queries), 1)
+
+        self.assertEqual(self.client.get(f"{url}?page_size=1", HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+        Lesson.objects.filter(module=module).first().delete()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_lesson_detail_etag(self):
+        course = self.make_course("prose", lessons=1)
+        lesson = Lesson.objects.get(module__course=course)
+        url = f"/api/lessons/{lesson.id}/"
+
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        etag = response["ETag"]
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        # Dates are only precise to the second, so they are never used:
+        # an edit in the same second must not yield a 304.
+        self.assertNotIn("Last-Modified", response)
+        since = http_date(lesson.updated_at.timestamp() + 1)
+        lesson.title = "changed"
+        lesson.save()
+        self.assertEqual(self.client.get(url, HTTP_IF_MODIFIED_SINCE=since).status_code, 200)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+        self.assertEqual(self.client.get("/api/lessons/999/").status_code, 404)
+
+
+class CourseTreeTests(ProgressTestMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+
+    def get_tree(self, course, **extra):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(f"/api/courses/{course.id}/tree/", **extra)
+        return response, len(ctx.captured_queries)
+
+    def test_tree_is_built_in_fixed_queries_and_cached(self):
+        course = self.make_course("economics", lessons=3)
+        for lesson in Lesson.objects.filter(module__course=course):
+            quiz = Quiz.objects.create(lesson=lesson, title=f"quiz for {lesson.title}")
+            Question.objects.create(quiz=quiz, text="q", option_a="a", option_b="b", correct_option="A")
+
+        response, queries = self.get_tree(course)
+        self.assertEqual(queries, 6)
+        data = response.json()
+        self.assertEqual(len(data["modules"][0]["lessons"]), 3)
+        question = data["modules"][0]["lessons"][0]["quizzes"][0]["questions"][0]
+        self.assertNotIn("correct_option", question)
+
+        response, queries = self.get_tree(course)
+        self.assertEqual(queries, 1)
+        self.assertEqual(response.json(), data)
+
+        response, _ = self.get_tree(course, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(response.status_code, 304)
+
+    def test_question_write_invalidates_tree(self):
+        course = self.make_course("law", lessons=1)
+        quiz = Quiz.objects.create(lesson=Lesson.objects.get(module__course=course), title="quiz")
+        self.get_tree(course)
+
+        self.client.force_authenticate(self.admin)
+        response = self.client.post("/api/questions/", {
+            "quiz": quiz.id, "text": "new", "option_a": "a", "option_b": "b", "correct_option": "B",
+        })
+        self.assertEqual(response.status_code, 201)
+
+        response, queries = self.get_tree(course)
+        self.assertEqual(queries, 6)
+        self.assertEqual(response.json()["modules"][0]["lessons"][0]["quizzes"][0]["questions"][0]["text"], "new")
+        self.assertEqual(self.client.get("/api/courses/999/tree/").status_code, 404)
+
+
+class BulkEnrollmentTests(ProgressTestMixin, APITestCase):
+    def make_students(self, count, prefix="s"):
+        return [User.objects.create(username=f"{prefix}{i}", role="student") for i in range(count)]
+
+    def bulk(self, course, action, students):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post(
+                f"/api/courses/{course.id}/{action}/", {"students": students}, format="json"
+            )
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json(), len(ctx.captured_queries)
+
+    def test_bulk_enroll_outcomes(self):
+        course = self.make_course("maths", lessons=2)
+        students = self.make_students(3)
+        course.students.add(students[2])
+        enrollments_added(course.id, [students[2].id])
+        self.client.force_authenticate(self.teacher)
+
+        data, _ = self.bulk(course, "bulk-enroll", [students[0].id, "s1", "s2", "ghost", self.teacher.id])
+
+        self.assertEqual([r["status"] for r in data["results"]], [
+            "enrolled", "enrolled", "already_enrolled", "not_found", "not_a_student",
+        ])
+        self.assertEqual(set(course.students.values_list("id", flat=True)), {s.id for s in students})
+        self.assertEqual(EnrollmentProgress.objects.get(course=course, student=students[0]).total_lessons, 2)
+
+        data, _ = self.bulk(course, "bulk-unenroll", ["s0", students[0].id, "ghost"])
+        self.assertEqual([r["status"] for r in data["results"]], ["unenrolled", "not_enrolled", "not_found"])
+        self.assertFalse(EnrollmentProgress.objects.filter(course=course, student=students[0]).exists())
+        self.assertEqual(rebuild_counters(fix=False), [])
+
+    def test_bulk_enroll_query_count_is_constant(self):
+        course = self.make_course("stats", lessons=1)
+        self.client.force_authenticate(self.admin)
+        _, few = self.bulk(course, "bulk-enroll", [s.id for s in self.make_students(2, "a")])
+        _, many = self.bulk(course, "bulk-enroll", [s.id for s in self.make_students(60, "b")])
+        self.assertEqual(few, many)
+
+    def test_bulk_enroll_requires_course_teacher(self):
+        course = self.make_course("logic")
+        student, = self.make_students(1)
+        self.client.force_authenticate(student)
+        response = self.client.post(f"/api/courses/{course.id}/bulk-enroll/", {"students": [1]}, format="json")
+        self.assertEqual(response.status_code, 403)
+
+    def test_csv_upload(self):
+        course = self.make_course("ethics")
+        self.make_students(3)
+        self.client.force_authenticate(self.teacher)
+        upload = SimpleUploadedFile("cohort.csv", b"username,email\ns0,a@x\ns1,b@x\n\ns2,c@x\nnobody,\n")
+
+        response = self.client.post(f"/api/courses/{course.id}/bulk-enroll/csv/", {"file": upload})
+
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(response.json()["summary"], {"enrolled": 3, "not_found": 1})
+        self.assertEqual(course.students.count(), 3)
+
+    def test_student_can_self_enroll(self):
+        course = self.make_course("rhetoric")
+        student, = self.make_students(1)
+        self.client.force_authenticate(student)
+        self.assertEqual(self.client.post(f"/api/courses/{course.id}/enroll/").status_code, 200)
+        self.assertTrue(EnrollmentProgress.objects.filter(course=course, student=student).exists())
+
+
+class CourseOwnershipTests(ProgressTestMixin, APITestCase):
+    def selects(self, ctx):
+        return [q["sql"] for q in ctx.captured_queries if q["sql"].startswith("SELECT")]
+
+    def test_lesson_write_resolves_ownership_in_the_fetch_query(self):
+        course = self.make_course("finance", lessons=1)
+        lesson = Lesson.objects.get(module__course=course)
+        self.client.force_authenticate(self.teacher)
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.patch(f"/api/lessons/{lesson.id}/", {"title": "renamed"}, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(self.selects(ctx)), 1)
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post(f"/api/modules/{lesson.module_id}/lessons/", {"title": "new"})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(self.selects(ctx)), 1)
+
+    def test_other_users_cannot_write(self):
+        course = self.make_course("accounting", lessons=1)
+        lesson = Lesson.objects.get(module__course=course)
+        module = lesson.module
+        outsider = User.objects.create(username="outsider", role="teacher")
+        self.client.force_authenticate(outsider)
+
+        self.assertEqual(self.client.patch(f"/api/lessons/{lesson.id}/", {"title": "x"}).status_code, 403)
+        self.assertEqual(self.client.delete(f"/api/modules/{module.id}/").status_code, 403)
+        self.assertEqual(self.client.post(f"/api/modules/{module.id}/lessons/", {"title": "x"}).status_code, 403)
+        self.assertEqual(self.client.post(f"/api/courses/{course.id}/modules/", {"title": "x"}).status_code, 403)
+        self.client.force_authenticate(None)
+        self.assertEqual(self.client.patch(f"/api/modules/{module.id}/", {"title": "x"}).status_code, 401)
+
+
+class ProgressEventsTests(ProgressTestMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.course = self.make_course("physics", lessons=4)
+        self.student, = self.enroll(self.course, 1, completed=1)
+        self.lessons = list(Lesson.objects.filter(module__course=self.course).order_by("order"))
+        self.client.force_authenticate(self.student)
+        # No timer thread writing behind the test's back; flush explicitly.
+        self.addCleanup(setattr, activity_buffer, "flush_interval", activity_buffer.flush_interval)
+        activity_buffer.flush_interval = None
+        self.addCleanup(activity_buffer.flush)
+
+    def post(self, *events):
+        return self.client.post("/api/progress/events/", {"events": list(events)}, format="json")
+
+    def test_batch_upserts_once_and_keeps_counters(self):
+        other = self.make_course("other", lessons=1)
+        events = [{"lesson": lesson.id} for lesson in self.lessons[:3]] * 2  # repeats and an already done lesson
+        events.append({"lesson": other.modules.get().lessons.get().id})  # not enrolled
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.post(*events)
+
+        self.assertEqual(response.data["completed"], [self.lessons[1].id, self.lessons[2].id])
+        inserts = [q for q in ctx.captured_queries if q["sql"].startswith('INSERT INTO "courses_lessonprogress"')]
+        self.assertEqual(len(inserts), 1)
+        self.assertEqual(
+            EnrollmentProgress.objects.get(student=self.student, course=self.course).completed_lessons, 3
+        )
+        self.assertEqual(rebuild_counters(fix=False), [])
+
+        self.post(*events)
+        self.assertEqual(rebuild_counters(fix=False), [])
+
+    def test_offline_events_keep_their_time(self):
+        self.post({"lesson": self.lessons[3].id, "at": "2026-01-02T03:04:05Z"})
+        progress = LessonProgress.objects.get(student=self.student, lesson=self.lessons[3])
+        self.assertEqual(progress.completed_at.isoformat(), "2026-01-02T03:04:05+00:00")
+
+    def test_heartbeats_are_coalesced_until_flushed(self):
+        activity_buffer.flush()
+        EnrollmentProgress.objects.filter(student=self.student).update(last_activity=None)
+
+        with CaptureQueriesContext(connection) as ctx:
+            for _ in range(3):
+                self.post({"lesson": self.lessons[0].id, "type": "heartbeat"})
+        self.assertFalse(any("courses_enrollmentprogress" in q["sql"] for q in ctx.captured_queries))
+
+        self.assertEqual(activity_buffer.flush(), 1)
+        self.assertIsNotNone(EnrollmentProgress.objects.get(student=self.student).last_activity)
+
+
+class CertificateIssuanceTests(ProgressTestMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.course = self.make_course("chemistry", lessons=2)
+        self.done, self.quiz_failed, self.partial = self.enroll(self.course, 3, completed=2)
+        LessonProgress.objects.filter(student=self.partial).delete()
+        rebuild_counters()
+        lesson = self.course.modules.get().lessons.first()
+        self.quiz = Quiz.objects.create(lesson=lesson, title="q")
+        for i in range(2):
+            Question.objects.create(quiz=self.quiz, text=f"q{i}", option_a="a", option_b="b",
+                                    option_c="c", option_d="d", correct_option="A")
+        QuixAttempt.objects.create(user=self.done, quiz=self.quiz, score=2)
+        QuixAttempt.objects.create(user=self.quiz_failed, quiz=self.quiz, score=0)
+
+    def test_issues_only_to_completed_and_passing_students(self):
+        self.client.force_authenticate(self.teacher)
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post(f"/api/courses/{self.course.id}/certificates/issue/")
+        self.assertEqual(response.data, {"issued": 1})
+        self.assertLessEqual(len(ctx.captured_queries), 7)
+        self.assertEqual(list(Certificate.objects.values_list("student_id", flat=True)), [self.done.id])
+
+        response = self.client.post(f"/api/courses/{self.course.id}/certificates/issue/")
+        self.assertEqual(response.data, {"issued": 0})
+
+    def test_repeating_answers_does_not_earn_a_certificate(self):
+        questions = list(self.quiz.questions.all())
+        self.client.force_authenticate(self.quiz_failed)
+        response = self.client.post(
+            f"/api/quizzes/{self.quiz.id}/submit/",
+            {"answers": [{"question": q.id, "selected_option": o} for q in questions for o in "DCBA"]},
+            format="json",
+        )
+        self.assertEqual(response.data["score"], 0)
+        # Attempts recorded before this rule, with impossible scores, don't count either.
+        QuixAttempt.objects.create(user=self.quiz_failed, quiz=self.quiz, score=8)
+        self.assertNotIn(self.quiz_failed.id, eligible_students([self.course.id])[self.course.id])
+
+    def test_manual_issue_checks_completion_and_never_duplicates(self):
+        url = f"/api/courses/{self.course.id}/certificate/"
+        self.client.force_authenticate(self.teacher)
+        self.assertEqual(self.client.post(url, {"student_id": self.partial.id}).status_code, 400)
+        self.assertEqual(self.client.post(url, {"student_id": self.done.id}).status_code, 201)
+
+        self.client.force_authenticate(self.admin)
+        self.assertEqual(self.client.post(url, {"student_id": self.done.id}).status_code, 200)
+        self.assertEqual(Certificate.objects.count(), 1)
+
+
+class CertificateRenderingTests(ProgressTestMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        self.enterContext(override_settings(MEDIA_ROOT=media.name))
+        self.course = self.make_course("biology", lessons=1)
+        self.first, self.second = self.enroll(self.course, 2)
+        User.objects.filter(pk__in=[self.first.pk, self.second.pk]).update(first_name="Ada", last_name="Lovelace")
+        for student in (self.first, self.second):
+            Certificate.objects.create(course=self.course, student=student)
+
+    def test_identical_documents_are_rendered_once(self):
+        self.assertEqual(render_pending(workers=0), 1)
+        names = set(Certificate.objects.values_list("file", flat=True))
+        self.assertEqual(len(names), 1)
+        self.assertRegex(names.pop(), r"^certificates/[0-9a-f]{2}/[0-9a-f]{64}\.pdf$")
+        self.assertEqual(render_pending(workers=0), 0)
+
+    def test_small_batches_render_without_a_process_pool(self):
+        def no_pool(*args, **kwargs):
+            raise AssertionError("a pool was started for one document")
+
+        self.addCleanup(setattr, rendering, "ProcessPoolExecutor", rendering.ProcessPoolExecutor)
+        rendering.ProcessPoolExecutor = no_pool
+        self.assertEqual(render_pending(workers=None), 1)
+
+    def test_purged_document_is_queued_again(self):
+        render_pending(workers=0)
+        certificate = Certificate.objects.get(student=self.first)
+        certificate.file.storage.delete(certificate.file.name)
+        url = f"/api/courses/{self.course.id}/certificate/?download=1"
+        self.client.force_authenticate(self.first)
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.assertEqual(self.client.get(url).status_code, 404)
+        self.assertEqual(len(callbacks), 1)
+        certificate.refresh_from_db()
+        self.assertFalse(certificate.file)
+
+        render_pending(workers=0)
+        self.assertEqual(self.client.get(url).status_code, 200)
+
+    def test_download_supports_ranges_and_caching(self):
+        url = f"/api/courses/{self.course.id}/certificate/?download=1"
+        self.client.force_authenticate(self.first)
+        self.assertEqual(self.client.get(url).status_code, 404)
+        render_pending(workers=0)
+
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(b"".join(response.streaming_content).startswith(b"%PDF-1.4"))
+        self.assertIn("immutable", response["Cache-Control"])
+
+        partial = self.client.get(url, HTTP_RANGE="bytes=0-3")
+        self.assertEqual(partial.status_code, 206)
+        self.assertEqual(b"".join(partial.streaming_content), b"%PDF")
+        self.assertTrue(partial["Content-Range"].startswith("bytes 0-3/"))
+
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"]).status_code, 304)
+        self.assertEqual(self.client.get(url, HTTP_RANGE="bytes=999999-").status_code, 416)
+
+
+class SearchTests(ProgressTestMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.course = Course.objects.create(
+            title="Python for <b>data</b> science", description="Pandas and plotting.", teacher=self.teacher
+        )
+        self.module = Module.objects.create(course=self.course, title="Basics", description="Variables and loops.")
+        self.lesson = Lesson.objects.create(
+            module=self.module, title="Loops", content="Iterate with while and for loops in python."
+        )
+        lessons_added(self.course.id)
+        Course.objects.create(title="Gardening", description="Soil and seeds.", teacher=self.teacher)
+
+    def results(self, **params):
+        response = self.client.get("/api/search/", params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_fts5_backend_is_used_when_the_index_exists(self):
+        self.assertIsInstance(get_backend(), FTS5Backend)
+
+    def test_title_matches_rank_first_and_are_highlighted(self):
+        results = self.results(q="python")["results"]
+        self.assertEqual([(r["type"], r["id"]) for r in results], [("course", self.course.id), ("lesson", self.lesson.id)])
+        self.assertEqual(results[0]["title"], "<mark>Python</mark> for &lt;b&gt;data&lt;/b&gt; science")
+        self.assertIn("<mark>python</mark>", results[1]["snippet"])
+        self.assertEqual(results[1]["course_id"], self.course.id)
+
+    def test_last_term_matches_as_prefix_and_type_filters(self):
+        self.assertEqual([r["type"] for r in self.results(q="pyth", type="lesson")["results"]], ["lesson"])
+        self.assertEqual(self.results(q="python gardening")["results"], [])
+
+    def test_writes_keep_the_index_current(self):
+        self.client.force_authenticate(self.teacher)
+        response = self.client.patch(f"/api/lessons/{self.lesson.id}/", {"content": "Recursion instead."})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([r["type"] for r in self.results(q="recursion")["results"]], ["lesson"])
+        self.assertEqual([r["type"] for r in self.results(q="iterate")["results"]], [])
+
+        self.assertEqual(self.client.delete(f"/api/modules/{self.module.id}/").status_code, 204)
+        self.assertEqual([r["type"] for r in self.results(q="python")["results"]], ["course"])
+
+    def test_deleting_a_teacher_removes_their_content(self):
+        staff = User.objects.create(username="staff", role="admin", is_staff=True)
+        self.client.force_authenticate(staff)
+        self.assertEqual(self.client.delete(f"/api/users/{self.teacher.id}/").status_code, 204)
+        for query in ("python", "loops", "gardening"):
+            self.assertEqual(self.results(q=query)["results"], [], query)
+
+    def test_hits_for_rows_deleted_behind_the_orm_are_dropped(self):
+        get_backend().upsert([("lesson", 999999, self.course.id, "Ghost lesson", "")])
+        self.assertEqual(self.results(q="ghost")["results"], [])
+        self.assertEqual(get_backend().search(["ghost"]), [])
+
+    def test_pages_and_validation(self):
+        for i in range(3):
+            Lesson.objects.create(module=self.module, title=f"Python extra {i}")
+        first = self.results(q="python", page_size=2)
+        self.assertEqual(len(first["results"]), 2)
+        self.assertIsNone(first["previous"])
+        second = self.client.get(first["next"]).json()
+        self.assertEqual(len(second["results"]), 2)
+        self.assertIsNotNone(second["next"])
+        self.assertEqual(self.client.get("/api/search/").status_code, 400)
+        self.assertEqual(self.client.get("/api/search/", {"q": "x", "type": "quiz"}).status_code, 400)
+
+    def test_memory_backend_agrees_with_fts5(self):
+        memory = MemoryBackend()
+        memory.rebuild()
+        results = memory.search(["python"])
+        self.assertEqual([(r["type"], r["id"]) for r in results], [("course", self.course.id), ("lesson", self.lesson.id)])
+        self.assertEqual(results[0]["title"], "<mark>Python</mark> for &lt;b&gt;data&lt;/b&gt; science")
+        self.assertEqual(results[1]["snippet"], "Iterate with while and for loops in <mark>python</mark>.")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            memory.upsert([("lesson", self.lesson.id, self.course.id, "Loops", "Recursion instead.")])
+            memory.remove("course", [self.course.id])
+        self.assertEqual(memory.search(["python"]), [])
+        self.assertEqual([r["id"] for r in memory.search(["recur"])], [self.lesson.id])
+
+
+class LessonSummaryTests(ProgressTestMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.course = self.make_course("chemistry", lessons=2)
+        self.module = self.course.modules.get()
+        self.lesson = self.module.lessons.first()
+        self.body = "Atoms and electrons. " * 1000 + "The end."
+        self.client.force_authenticate(self.teacher)
+        self.client.patch(f"/api/lessons/{self.lesson.id}/", {"content": self.body})
+
+    def test_list_leaves_out_bodies(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(f"/api/modules/{self.module.id}/lessons/")
+        self.assertEqual(response.status_code, 200)
+        first = response.json()["results"][0]
+        self.assertNotIn("content", first)
+        self.assertEqual(first["content_length"], len(self.body))
+        self.assertEqual(first["content_hash"], Lesson.hash_content(self.body))
+        lesson_selects = [q["sql"] for q in ctx.captured_queries if 'FROM "courses_lesson"' in q["sql"]]
+        self.assertTrue(lesson_selects)
+        self.assertFalse(any('"courses_lesson"."content"' in sql for sql in lesson_selects))
+
+    def test_detail_serves_body_matching_the_summary(self):
+        detail = self.client.get(f"/api/lessons/{self.lesson.id}/").json()
+        self.assertEqual(detail["content"], self.body)
+        self.assertEqual(detail["content_hash"], Lesson.hash_content(detail["content"]))
+
+        self.client.patch(f"/api/lessons/{self.lesson.id}/", {"content": "Bonds"})
+        self.lesson.refresh_from_db()
+        self.assertEqual((self.lesson.content_length, self.lesson.content_hash), (5, Lesson.hash_content("Bonds")))
@@ -0,0 +1,49 @@
+from django.core.cache import cache
+from django.db.models import F, Prefetch
+from rest_framework.renderers import JSONRenderer
+
+from .models import Course, Module, Lesson, Quiz, Question
+from .serializers import CourseTreeSerializer
+
+TREE_CACHE_TIMEOUT = 24 * 60 * 60
+
+
+def _tree_cache_key(course_id, version):
+    return f"course-tree:{course_id}:{version}"
+
+
+def build_course_tree(course_id):
+    """Serialize course -> modules -> lessons -> quizzes -> questions.
+
+    Five queries whatever the size of the course, one per level.
+    """
+    course = Course.objects.prefetch_related(
+        Prefetch('modules', queryset=Module.objects.order_by('order', 'id')),
+        Prefetch('modules__lessons', queryset=Lesson.objects.order_by('order', 'id')),
+        Prefetch('modules__lessons__quizzes', queryset=Quiz.objects.order_by('id')),
+        Prefetch('modules__lessons__quizzes__questions', queryset=Question.objects.order_by('id')),
+    ).get(pk=course_id)
+    return CourseTreeSerializer(course).data
+
+
+def get_course_tree_json(course_id, version):
+    """Rendered JSON bytes of the course tree at ``version``.
+
+    Entries are keyed by content_version, so a bump makes the old entry
+    unreachable instead of having to delete it.
+    """
+    key = _tree_cache_key(course_id, version)
+    content = cache.get(key)
+    if content is None:
+        content = JSONRenderer().render(build_course_tree(course_id))
+        cache.set(key, content, TREE_CACHE_TIMEOUT)
+    return content
+
+
+def invalidate_course_tree(**lookup):
+    """Bump content_version of the courses matching a Course lookup.
+
+    e.g. ``invalidate_course_tree(pk=course.id)`` or
+    ``invalidate_course_tree(modules__lessons__quizzes__id__in=[quiz_id])``.
+    """
+    Course.objects.filter(**lookup).update(content_version=F('content_version') + 1)
@@ -11,7 +11,10 @@ from .views import (
     LessonDetailView,
     StudentProgressView,       
     CourseProgressView,
-    CertificateView         
+    CertificateView,
+    CourseTreeView,
+    ProgressEventsView,
+    SearchView,
 )
 router = DefaultRouter()
 router.register(r'courses', CourseViewSet, basename='course')
@@ -21,11 +24,14 @@ router.register(r'questions', QuestionViewSet, basename='question')
 urlpatterns = [
     path('', include(router.urls)),
     path('courses/<int:course_id>/modules/', ModuleListCreateView.as_view(), name='module-list-create'),
+    path('courses/<int:course_id>/tree/', CourseTreeView.as_view(), name='course-tree'),
     path('modules/<int:pk>/', ModuleDetailView.as_view(), name='module-detail'),
     path('modules/<int:module_id>/lessons/', LessonListCreateView.as_view(), name='lesson-list-create'),
     path('lessons/<int:pk>/', LessonDetailView.as_view(), name='lesson-detail'),
     path('students/<int:student_id>/enrollments/', StudentEnrollmentListView.as_view(), name='student-enrollments'),
     path('students/<int:student_id>/progress/', StudentProgressView.as_view(), name='student-progress'),
+    path('progress/events/', ProgressEventsView.as_view(), name='progress-events'),
+    path('search/', SearchView.as_view(), name='search'),
    
     path('courses/<int:course_id>/progress/', CourseProgressView.as_view(), name='course-progress'),
     path('courses/<int:course_id>/certificate/', CertificateView.as_view(), name='course-certificate'),
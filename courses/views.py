@@ -1,3 +1,5 @@
+import os
+
 from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action
 from rest_framework.views import APIView
@@ -5,22 +7,62 @@ from rest_framework.permissions import IsAuthenticated
 
 from rest_framework.response import Response
 from django.shortcuts import get_object_or_404
+from django.db import transaction
 from rest_framework import generics, permissions
 from rest_framework.generics import ListAPIView
 from django.contrib.auth import get_user_model
 
-from rest_framework.exceptions import PermissionDenied
-from .models import Course,Certificate, Module, Lesson,Quiz,Question,QuixAttempt,Answer,LessonProgress
-from .serializers import CertificateSerializer,CourseSerializer, ModuleSerializer,LessonSerializer, QuizSerializer,QuestionSerializer
-from .permissions import IsCourseTeacherOrReadOnly
+from rest_framework.exceptions import NotFound, PermissionDenied, ValidationError
+from rest_framework.parsers import MultiPartParser
+from rest_framework.utils.urls import replace_query_param
+from django.http import HttpResponse
+from django.conf import settings
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from core.files import immutable_file_response
+from core.conditional import ConditionalDetailMixin, ConditionalListMixin
+from .models import Course,Certificate, Module, Lesson,Quiz,Question,QuixAttempt
+from .serializers import CertificateSerializer,CourseSerializer, ModuleSerializer,LessonSerializer, QuizSerializer,QuestionSerializer, RosterSerializer
+from .serializers import LessonSummarySerializer, ProgressBatchSerializer
+from .permissions import IsAdminOnly, IsCourseTeacherOrReadOnly, is_course_teacher, with_course_owner
+from .grading import answer_key_cache, grade_submission, invalidate_answer_keys
+from .enrollment import bulk_enroll, bulk_unenroll, read_csv_identifiers
+from .tree import get_course_tree_json, invalidate_course_tree
+from .progress import (
+    student_progress, course_progress,
+    enrollments_added, enrollments_removed, lessons_added, lessons_removed, record_completions,
+)
+from .activity import activity_buffer
+from .certificates import eligible_students, issue_certificates
+from .rendering import schedule_rendering
+from . import search
 User = get_user_model()
 
 class CourseViewSet(viewsets.ModelViewSet):
     queryset = Course.objects.all()
     serializer_class = CourseSerializer
+    keyset_ordering = ('created_at', 'id')
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action in ['list', 'retrieve']:
+            queryset = queryset.with_enrolled_count()
+            if 'students' in self.get_expand():
+                queryset = queryset.prefetch_related('students')
+        return queryset
+
+    def get_expand(self):
+        if self.action != 'retrieve':
+            return set()
+        return set(filter(None, self.request.query_params.get('expand', '').split(',')))
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['expand'] = self.get_expand()
+        return context
 
     def get_permissions(self):
-        if self.action in ['create', 'update', 'partial_update', 'destroy']:
+        if self.action in ['create', 'update', 'partial_update', 'destroy', 'students']:
             return [permissions.IsAuthenticated()]
         return [permissions.AllowAny()]
 
@@ -34,19 +76,35 @@ class CourseViewSet(viewsets.ModelViewSet):
                 raise ValueError("Admin must provide a teacher id")
         # Agar teacher hai to apne naam se hi banega
         elif user.role == "teacher":
-            serializer.save(teacher=user)
+            serializer.save(teacher_id=user.id)
         else:
             raise PermissionError("Only Admin or Teacher can create courses")
 
+    def perform_update(self, serializer):
+        with transaction.atomic():
+            course = serializer.save()
+            invalidate_course_tree(pk=course.pk)
+
+    @action(detail=True, methods=['get'], keyset_ordering=('id',))
+    def students(self, request, pk=None):
+        course = self.get_object()
+        queryset = User.objects.filter(enrollments__course=course).only(
+            'id', 'username', 'first_name', 'last_name'
+        )
+        page = self.paginate_queryset(queryset)
+        return self.get_paginated_response(RosterSerializer(page, many=True).data)
+
     @action(detail=True, methods=['post'], permission_classes=[permissions.IsAuthenticated])
     def enroll(self, request, pk=None):
         course = self.get_object()
         user = request.user
 
-        if user.role != "Student":
+        if user.role != "student":
             return Response({"detail": "Only students can enroll."}, status=status.HTTP_403_FORBIDDEN)
 
-        course.students.add(user)
+        with transaction.atomic():
+            course.students.add(user.id)
+            enrollments_added(course.id, [user.id])
         return Response({"detail": "Enrolled successfully."})
 
     @action(detail=True, methods=['post'], permission_classes=[permissions.IsAuthenticated])
@@ -54,48 +112,145 @@ class CourseViewSet(viewsets.ModelViewSet):
         course = self.get_object()
         user = request.user
 
-        if user.role != "Student":
+        if user.role != "student":
             return Response({"detail": "Only students can unenroll."}, status=status.HTTP_403_FORBIDDEN)
 
-        course.students.remove(user)
+        with transaction.atomic():
+            course.students.remove(user.id)
+            enrollments_removed(course.id, [user.id])
         return Response({"detail": "Unenrolled successfully."})
 
-class ModuleListCreateView(generics.ListCreateAPIView):
+    def get_managed_course(self):
+        course = self.get_object()
+        user = self.request.user
+        if user.role != "admin" and course.teacher_id != user.id:
+            raise PermissionDenied("Only the course's teacher or an admin can manage enrollments.")
+        return course
+
+    def get_identifiers(self):
+        identifiers = self.request.data.get('students')
+        if not isinstance(identifiers, list) or not all(
+            isinstance(i, (int, str)) and not isinstance(i, bool) for i in identifiers
+        ):
+            raise ValidationError({"students": "Expected a list of student ids or usernames."})
+        return identifiers
+
+    def bulk_response(self, outcomes):
+        summary = {}
+        for outcome in outcomes:
+            summary[outcome["status"]] = summary.get(outcome["status"], 0) + 1
+        return Response({"summary": summary, "results": outcomes})
+
+    @action(detail=True, methods=['post'], url_path='certificates/issue', permission_classes=[permissions.IsAuthenticated])
+    def issue_certificates(self, request, pk=None):
+        course = self.get_managed_course()
+        issued = issue_certificates([course.id], issued_by_id=request.user.id)
+        if issued:
+            schedule_rendering([course.id])
+        return Response({"issued": issued.get(course.id, 0)})
+
+    @action(detail=True, methods=['post'], url_path='bulk-enroll', permission_classes=[permissions.IsAuthenticated])
+    def bulk_enroll(self, request, pk=None):
+        course = self.get_managed_course()
+        return self.bulk_response(bulk_enroll(course, self.get_identifiers()))
+
+    @action(detail=True, methods=['post'], url_path='bulk-unenroll', permission_classes=[permissions.IsAuthenticated])
+    def bulk_unenroll(self, request, pk=None):
+        course = self.get_managed_course()
+        return self.bulk_response(bulk_unenroll(course, self.get_identifiers()))
+
+    @action(detail=True, methods=['post'], url_path='bulk-enroll/csv', permission_classes=[permissions.IsAuthenticated],
+            parser_classes=[MultiPartParser])
+    def bulk_enroll_csv(self, request, pk=None):
+        course = self.get_managed_course()
+        upload = request.FILES.get('file')
+        if upload is None:
+            raise ValidationError({"file": "A CSV file is required."})
+
+        outcomes = []
+        try:
+            # Parse and enroll chunk by chunk, all or nothing.
+            with transaction.atomic():
+                for identifiers in read_csv_identifiers(upload.file):
+                    outcomes.extend(bulk_enroll(course, identifiers))
+        except (ValueError, UnicodeDecodeError) as exc:
+            raise ValidationError({"file": str(exc)})
+        return self.bulk_response(outcomes)
+
+class ModuleListCreateView(ConditionalListMixin, generics.ListCreateAPIView):
     serializer_class = ModuleSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    keyset_ordering = ('order', 'id')
 
 
     def get_queryset(self):
         return Module.objects.filter(course_id=self.kwargs['course_id']).order_by('order', 'id')
 
     def perform_create(self, serializer):
-        course = get_object_or_404(Course, pk=self.kwargs['course_id'])
-        if self.request.user != course.teacher:
+        course = get_object_or_404(Course.objects.only('id', 'teacher_id'), pk=self.kwargs['course_id'])
+        if not is_course_teacher(self.request, course):
             raise PermissionDenied("Only the course's teacher can add modules.")
-        serializer.save(course=course)
+        with transaction.atomic():
+            serializer.save(course=course)
+            invalidate_course_tree(pk=course.pk)
 
-class ModuleDetailView(generics.RetrieveUpdateDestroyAPIView):
-    queryset = Module.objects.all()
+class ModuleDetailView(ConditionalDetailMixin, generics.RetrieveUpdateDestroyAPIView):
+    queryset = with_course_owner(Module.objects.all())
     serializer_class = ModuleSerializer
     permission_classes = [IsCourseTeacherOrReadOnly]
 
-class LessonListCreateView(generics.ListCreateAPIView):
+    def perform_update(self, serializer):
+        with transaction.atomic():
+            module = serializer.save()
+            invalidate_course_tree(pk=module.course_id)
+
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            lessons_removed(instance.course_id, instance.lessons.values_list('id', flat=True))
+            instance.delete()
+            invalidate_course_tree(pk=instance.course_id)
+
+class LessonListCreateView(ConditionalListMixin, generics.ListCreateAPIView):
     serializer_class = LessonSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    keyset_ordering = ('order', 'id')
 
     def get_queryset(self):
-        return Lesson.objects.filter(module_id=self.kwargs['module_id']).order_by('order', 'id')
+        queryset = Lesson.objects.filter(module_id=self.kwargs['module_id']).order_by('order', 'id')
+        if self.request.method == 'GET':
+            # Bodies are served one at a time by LessonDetailView.
+            queryset = queryset.defer('content')
+        return queryset
+
+    def get_serializer_class(self):
+        if self.request.method == 'GET':
+            return LessonSummarySerializer
+        return LessonSerializer
 
     def perform_create(self, serializer):
-        module = get_object_or_404(Module, pk=self.kwargs['module_id'])
-        if self.request.user != module.course.teacher:
+        module = get_object_or_404(with_course_owner(Module.objects.only('id', 'course_id')), pk=self.kwargs['module_id'])
+        if not is_course_teacher(self.request, module):
             raise PermissionDenied("Only the course's teacher can add lessons.")
-        serializer.save(module=module)
-class LessonDetailView(generics.RetrieveUpdateDestroyAPIView):
-    queryset = Lesson.objects.all()
+        with transaction.atomic():
+            serializer.save(module=module)
+            lessons_added(module.course_id)
+            invalidate_course_tree(pk=module.course_id)
+class LessonDetailView(ConditionalDetailMixin, generics.RetrieveUpdateDestroyAPIView):
+    queryset = with_course_owner(Lesson.objects.all())
     serializer_class = LessonSerializer
     permission_classes = [IsCourseTeacherOrReadOnly]
 
+    def perform_update(self, serializer):
+        with transaction.atomic():
+            serializer.save()
+            invalidate_course_tree(pk=serializer.instance.owner_course_id)
+
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            lessons_removed(instance.owner_course_id, [instance.id])
+            instance.delete()
+            invalidate_course_tree(pk=instance.owner_course_id)
+
 class StudentEnrollmentListView(ListAPIView):
     serializer_class = CourseSerializer
     permission_classes = [permissions.IsAuthenticated]
@@ -107,13 +262,36 @@ class StudentEnrollmentListView(ListAPIView):
         if user.id != student_id and user.role.lower() != "admin":
             raise PermissionDenied("You cannot view other students' enrollments.")
 
-        return Course.objects.filter(students__id=student_id).order_by("id")
+        return Course.objects.filter(enrollments__student_id=student_id).with_enrolled_count()
     
 
 class QuizViewSet(viewsets.ModelViewSet):
     queryset = Quiz.objects.all()
     serializer_class = QuizSerializer
 
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action in ['submit', 'results', 'answer_key_cache']:
+            # These actions only need the quiz's identity, title and key version.
+            return queryset.only('id', 'title', 'answer_key_version')
+        return queryset.prefetch_related('questions')
+
+    def perform_create(self, serializer):
+        with transaction.atomic():
+            quiz = serializer.save()
+            invalidate_course_tree(modules__lessons__id=quiz.lesson_id)
+
+    def perform_update(self, serializer):
+        old_lesson_id = serializer.instance.lesson_id
+        with transaction.atomic():
+            quiz = serializer.save()
+            invalidate_course_tree(modules__lessons__id__in=[old_lesson_id, quiz.lesson_id])
+
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            instance.delete()
+            invalidate_course_tree(modules__lessons__id=instance.lesson_id)
+
     @action(detail=True, methods=['post'], permission_classes=[permissions.IsAuthenticated])
     def submit(self, request, pk=None):
         quiz = self.get_object()
@@ -123,48 +301,38 @@ class QuizViewSet(viewsets.ModelViewSet):
         if not answers_data:
             return Response({"detail": "No answers submitted."}, status=status.HTTP_400_BAD_REQUEST)
 
-        attempt = QuixAttempt.objects.create(user=user, quiz=quiz)
-        score = 0
-
-        for ans_data in answers_data:
-            question_id = ans_data.get('question')
-            selected_option = ans_data.get('selected_option')
-
-            question = quiz.questions.filter(id=question_id).first()
-            if not question:
-                continue
-
-            # Save Answer
-            Answer.objects.create(
-                attempt=attempt,
-                question=question,
-                selected_option=selected_option
-            )
-
-            # Check if correct
-            if selected_option and selected_option.upper() == question.correct_option.upper():
-                score += 1
-
-        attempt.score = score
-        attempt.save()
+        attempt = grade_submission(quiz, user, answers_data)
+        score = attempt.score
 
         return Response({"detail": "Quiz submitted successfully.", "score": score})
 
+    @action(detail=False, methods=['get'], url_path='answer-key-cache', permission_classes=[IsAdminOnly])
+    def answer_key_cache(self, request):
+        return Response(answer_key_cache.stats())
+
     @action(detail=True, methods=['get'], permission_classes=[permissions.IsAuthenticated])
     def results(self, request, pk=None):
         quiz = self.get_object()
         user = request.user
 
-        attempt = QuixAttempt.objects.filter(user=user, quiz=quiz).order_by('-completed_at').first()
+        attempt = (
+            QuixAttempt.objects.filter(user_id=user.id, quiz=quiz)
+            .order_by('-completed_at')
+            .only('id', 'score')
+            .first()
+        )
         if not attempt:
             return Response({"detail": "No attempt found."}, status=status.HTTP_404_NOT_FOUND)
 
+        answers = attempt.answers.order_by('id').values_list(
+            'question__text', 'selected_option', 'question__correct_option'
+        )
         answers_detail = []
-        for ans in attempt.answers.all():
+        for text, selected_option, correct_option in answers:
             answers_detail.append({
-                "question": ans.question.text,
-                "selected_option": ans.selected_option,
-                "correct_option": ans.question.correct_option
+                "question": text,
+                "selected_option": selected_option,
+                "correct_option": correct_option
             })
 
         return Response({
@@ -177,6 +345,44 @@ class QuestionViewSet(viewsets.ModelViewSet):
     queryset = Question.objects.all()
     serializer_class = QuestionSerializer
 
+    def perform_create(self, serializer):
+        with transaction.atomic():
+            question = serializer.save()
+            invalidate_answer_keys(question.quiz_id)
+            invalidate_course_tree(modules__lessons__quizzes__id=question.quiz_id)
+
+    def perform_update(self, serializer):
+        old_quiz_id = serializer.instance.quiz_id
+        with transaction.atomic():
+            question = serializer.save()
+            invalidate_answer_keys(old_quiz_id, question.quiz_id)
+            invalidate_course_tree(modules__lessons__quizzes__id__in=[old_quiz_id, question.quiz_id])
+
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            instance.delete()
+            invalidate_answer_keys(instance.quiz_id)
+            invalidate_course_tree(modules__lessons__quizzes__id=instance.quiz_id)
+
+class CourseTreeView(APIView):
+    """The whole course content tree in one response, served from cache."""
+
+    def get(self, request, course_id):
+        version = Course.objects.filter(pk=course_id).values_list('content_version', flat=True).first()
+        if version is None:
+            raise NotFound("No Course matches the given query.")
+
+        etag = f'"course-tree-{course_id}-{version}"'
+        not_modified = get_conditional_response(request, etag=etag)
+        if not_modified is not None:
+            not_modified['ETag'] = etag
+            return not_modified
+
+        # Bypass DRF rendering: the cached bytes are already JSON.
+        response = HttpResponse(get_course_tree_json(course_id, version), content_type='application/json')
+        response['ETag'] = etag
+        return response
+
 class StudentProgressView(APIView):
     permission_classes = [IsAuthenticated]
 
@@ -186,53 +392,44 @@ class StudentProgressView(APIView):
         if user.id != student_id and user.role.lower() != "admin":
             raise PermissionDenied("You cannot view other students' progress.")
 
-        courses = Course.objects.filter(students__id=student_id)
-        data = []
-
-        for course in courses:
-            total_lessons = Lesson.objects.filter(module__course=course).count()
-            completed_lessons = LessonProgress.objects.filter(
-                lesson__module__course=course,
-                student_id=student_id,
-                completed=True
-            ).count()
-            percent = (completed_lessons / total_lessons * 100) if total_lessons > 0 else 0
-
-            data.append({
-                'course_id': course.id,
-                'course_title': course.title,
-                'total_lessons': total_lessons,
-                'completed_lessons': completed_lessons,
-                'progress_percent': round(percent, 2)
-            })
-
-        return Response(data)
+        return Response(student_progress(student_id))
     
 class CourseProgressView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request, course_id):
         course = get_object_or_404(Course, id=course_id)
-        data = []
-
-        for student in course.students.all():
-            total_lessons = Lesson.objects.filter(module__course=course).count()
-            completed_lessons = LessonProgress.objects.filter(
-                lesson__module__course=course,
-                student=student,
-                completed=True
-            ).count()
-            percent = (completed_lessons / total_lessons * 100) if total_lessons > 0 else 0
-
-            data.append({
-                'student_id': student.id,
-                'student_name': student.username,
-                'total_lessons': total_lessons,
-                'completed_lessons': completed_lessons,
-                'progress_percent': round(percent, 2)
-            })
+        return Response(course_progress(course.id))
+class ProgressEventsView(APIView):
+    """Ingest a batch of player events for the requesting student.
+
+    Completions are deduplicated in memory (earliest time wins) and
+    upserted in one statement; heartbeats go to the per-process
+    activity buffer and never touch the database on this request.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        serializer = ProgressBatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        now = timezone.now()
+
+        completions, heartbeats = {}, 0
+        for event in serializer.validated_data['events']:
+            at = min(event.get('at', now), now)
+            if event['type'] == 'heartbeat':
+                activity_buffer.touch(request.user.id, event['lesson'], at)
+                heartbeats += 1
+            elif event['lesson'] not in completions or at < completions[event['lesson']]:
+                completions[event['lesson']] = at
+
+        completed = record_completions(request.user.id, completions) if completions else []
+        return Response({
+            'completed': completed,
+            'events': len(serializer.validated_data['events']),
+            'heartbeats': heartbeats,
+        })
 
-        return Response(data)
 class CertificateView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
@@ -240,10 +437,26 @@ class CertificateView(APIView):
         user = request.user
         course = get_object_or_404(Course, pk=course_id)
 
-        cert = Certificate.objects.filter(course=course, student=user).first()
+        cert = Certificate.objects.filter(course=course, student_id=user.id).first()
         if not cert:
             return Response({"detail": "Certificate not found or course not completed."}, status=status.HTTP_404_NOT_FOUND)
 
+        if request.query_params.get('download'):
+            if not cert.file:
+                return Response({"detail": "Certificate document is not ready yet."}, status=status.HTTP_404_NOT_FOUND)
+            try:
+                document = cert.file.open('rb')
+            except FileNotFoundError:
+                # Purged from storage: forget the name so it is rendered again.
+                Certificate.objects.filter(pk=cert.pk).update(file='')
+                schedule_rendering([course.id])
+                return Response({"detail": "Certificate document is not ready yet."}, status=status.HTTP_404_NOT_FOUND)
+            # Files are content-addressed, so the name is a stable validator.
+            etag = '"%s"' % os.path.splitext(os.path.basename(cert.file.name))[0]
+            return immutable_file_response(
+                request, document, etag, 'application/pdf', filename=f"certificate-{course.id}.pdf"
+            )
+
         serializer = CertificateSerializer(cert)
         return Response(serializer.data)
 
@@ -260,8 +473,51 @@ class CertificateView(APIView):
             return Response({"detail": "student_id is required."}, status=status.HTTP_400_BAD_REQUEST)
 
         student = get_object_or_404(User, pk=student_id)
+        if student.id not in eligible_students([course.id], [student.id]).get(course.id, ()):
+            return Response({"detail": "Student has not completed the course."}, status=status.HTTP_400_BAD_REQUEST)
 
-        certificate, created = Certificate.objects.get_or_create(course=course, student=student, issued_by=user)
+        # issued_by is not part of the identity: a second issuer gets the existing row.
+        certificate, created = Certificate.objects.get_or_create(
+            course=course, student=student, defaults={'issued_by_id': user.id}
+        )
+        if created:
+            schedule_rendering([course.id])
 
         serializer = CertificateSerializer(certificate)
-        return Response(serializer.data, status=status.HTTP_201_CREATED if created else status.HTTP_200_OK)
\ No newline at end of file
+        return Response(serializer.data, status=status.HTTP_201_CREATED if created else status.HTTP_200_OK)
+
+class SearchView(APIView):
+    """Ranked full-text search across courses, modules and lessons.
+
+    ``q`` is required; ``type`` narrows to one kind. Titles and snippets
+    come back HTML-escaped with matches wrapped in <mark>. Relevance order
+    has no stable key to seek on, so pages are numbered and capped at
+    ``SEARCH["MAX_PAGE"]``.
+    """
+    permission_classes = [permissions.AllowAny]
+    page_size = 20
+    max_page_size = 100
+
+    def get(self, request):
+        params = request.query_params
+        query = params.get('q', '').strip()
+        if not query:
+            raise ValidationError({'q': 'This parameter is required.'})
+        kind = params.get('type') or None
+        if kind is not None and kind not in search.KINDS:
+            raise ValidationError({'type': f"Must be one of: {', '.join(search.KINDS)}."})
+        try:
+            page = max(int(params.get('page', 1)), 1)
+            size = min(max(int(params.get('page_size', self.page_size)), 1), self.max_page_size)
+        except ValueError:
+            raise ValidationError({'detail': 'page and page_size must be integers.'})
+        if page > getattr(settings, 'SEARCH', {}).get('MAX_PAGE', 50):
+            raise NotFound('Refine the query to see more results.')
+
+        results = search.search(query, kind=kind, limit=size + 1, offset=(page - 1) * size)
+        url = request.build_absolute_uri()
+        return Response({
+            'next': replace_query_param(url, 'page', page + 1) if len(results) > size else None,
+            'previous': replace_query_param(url, 'page', page - 1) if page > 1 else None,
+            'results': results[:size],
+        })
@@ -0,0 +1,123 @@
+"""Server-Sent Events stream of a user's new notifications (ASGI only).
+
+One long-lived connection per user replaces polling the list endpoint.
+Each event's id is the Notification receipt id, so a reconnecting client
+that sends ``Last-Event-ID`` first gets everything it missed from the
+database, then live events from the broker in notifications.pubsub.
+
+Browsers authenticate with a short-lived ``?token=`` from
+``stream-token/``; other clients may send the usual Authorization header.
+Under WSGI the view answers 501 rather than hold a worker forever.
+"""
+import json
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import require_GET
+from rest_framework.exceptions import APIException, AuthenticationFailed
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from rest_framework_simplejwt.settings import api_settings
+
+from accounts.authentication import ClaimsJWTAuthentication, check_token_version, get_token_state
+
+from .models import Notification
+from .pubsub import get_broker
+from .serializers import NotificationSerializer
+from .tokens import StreamToken
+
+REPLAY_BATCH = 100
+
+_jwt = ClaimsJWTAuthentication()
+
+
+def _format(event):
+    return f"id: {event['id']}\nevent: notification\ndata: {json.dumps(event)}\n\n"
+
+
+async def _replay(user_id, after):
+    """Serialized receipts newer than ``after``, oldest first, in batches."""
+    queryset = Notification.objects.filter(user_id=user_id).select_related("announcement").order_by("id")
+    while True:
+        batch = [receipt async for receipt in queryset.filter(id__gt=after)[:REPLAY_BATCH]]
+        if not batch:
+            return
+        for event in NotificationSerializer(batch, many=True).data:
+            yield event
+        after = batch[-1].id
+
+
+async def event_stream(user_id, last_event_id=None, heartbeat=15):
+    """Yield SSE frames for ``user_id`` until the client goes away."""
+    broker = get_broker()
+    # Subscribe before replaying so nothing created in between is lost;
+    # events already sent by the replay are skipped by id.
+    subscription = broker.subscribe(user_id)
+    last_id = last_event_id or 0
+    try:
+        yield "retry: 3000\n\n"
+        replay = last_event_id is not None
+        while True:
+            if replay or subscription.overflowed:
+                subscription.overflowed = False
+                async for event in _replay(user_id, last_id):
+                    last_id = event["id"]
+                    yield _format(event)
+                replay = False
+
+            event = await subscription.get(heartbeat)
+            if event is None:
+                yield ": keep-alive\n\n"
+            elif event["id"] > last_id:
+                last_id = event["id"]
+                yield _format(event)
+    finally:
+        broker.unsubscribe(subscription)
+
+
+def _authenticate(request):
+    """User id from a ``?token=`` StreamToken or the Authorization header, or None."""
+    raw = request.GET.get("token")
+    if raw is None:
+        auth = _jwt.authenticate(request)
+        return auth and auth[0].id
+    try:
+        token = StreamToken(raw)
+    except TokenError as exc:
+        raise InvalidToken(str(exc))
+    user_id = token[api_settings.USER_ID_CLAIM]
+    state = get_token_state(user_id)
+    if state is None:
+        raise AuthenticationFailed("User not found", code="user_not_found")
+    check_token_version(token, state.version, state.is_active)
+    return user_id
+
+
+@require_GET
+async def notification_stream(request):
+    # Under WSGI the server would drain this endless iterator on one
+    # worker thread; refuse instead of tying the worker up.
+    if not isinstance(request, ASGIRequest):
+        return JsonResponse({"detail": "The notification stream requires an ASGI server."}, status=501)
+    try:
+        user_id = await sync_to_async(_authenticate)(request)
+    except APIException as exc:
+        return JsonResponse({"detail": exc.detail}, status=exc.status_code)
+    if user_id is None:
+        return JsonResponse({"detail": "Authentication credentials were not provided."}, status=401)
+
+    last_event_id = request.headers.get("Last-Event-ID") or request.GET.get("last_event_id")
+    if last_event_id is not None:
+        try:
+            last_event_id = int(last_event_id)
+        except ValueError:
+            return JsonResponse({"detail": "Last-Event-ID must be a notification id."}, status=400)
+
+    heartbeat = getattr(settings, "NOTIFICATION_STREAM", {}).get("HEARTBEAT", 15)
+    response = StreamingHttpResponse(
+        event_stream(user_id, last_event_id, heartbeat), content_type="text/event-stream"
+    )
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
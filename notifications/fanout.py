@@ -0,0 +1,119 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.db.models import F, Max
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from courses.models import Enrollment
+
+from .models import Announcement, FanoutJob, Notification
+from .pubsub import publish_receipts
+
+logger = logging.getLogger(__name__)
+
+User = get_user_model()
+
+_config = getattr(settings, "NOTIFICATION_FANOUT", {})
+CHUNK_SIZE = _config.get("CHUNK_SIZE", 1000)
+
+_executor = ThreadPoolExecutor(max_workers=_config.get("WORKERS", 2), thread_name_prefix="fanout")
+
+
+def recipients(job):
+    """Recipient user ids for a job as (queryset, id field), ordered for keyset chunking."""
+    if job.course_id is not None:
+        return Enrollment.objects.filter(course_id=job.course_id), "student_id"
+    if job.role:
+        return User.objects.filter(role=job.role), "id"
+    return User.objects.filter(id__in=job.user_ids or []), "id"
+
+
+def _chunks(job, last=0):
+    qs, field = recipients(job)
+    qs = qs.order_by(field).values_list(field, flat=True)
+    while True:
+        ids = list(qs.filter(**{f"{field}__gt": last})[:CHUNK_SIZE])
+        if not ids:
+            return
+        yield ids
+        last = ids[-1]
+
+
+def _update(job_id, **fields):
+    return FanoutJob.objects.filter(pk=job_id).update(updated_at=timezone.now(), **fields)
+
+
+def run_job(job_id):
+    """Store the body once, then insert one receipt per recipient, CHUNK_SIZE rows per INSERT.
+
+    Chunks walk recipients in id order and each commits with its
+    ``delivered`` bump, so a job interrupted midway resumes after the
+    highest recipient that already has a receipt.
+    """
+    job = FanoutJob.objects.get(pk=job_id)
+    now = timezone.now()
+    _update(job_id, status="running", started_at=Coalesce(F("started_at"), now))
+    try:
+        after = 0
+        if job.announcement_id is None:
+            job.announcement = Announcement.objects.create(title=job.title, message=job.message)
+            _update(job_id, announcement=job.announcement)
+        else:
+            after = Notification.objects.filter(announcement_id=job.announcement_id).aggregate(
+                last=Max("user_id")
+            )["last"] or 0
+        for ids in _chunks(job, after):
+            with transaction.atomic():
+                receipts = Notification.objects.bulk_create(
+                    [Notification(user_id=user_id, announcement=job.announcement) for user_id in ids]
+                )
+                _update(job_id, delivered=F("delivered") + len(ids))
+            publish_receipts(receipts)
+    except Exception as exc:
+        logger.exception("Notification fan-out %s failed", job_id)
+        _update(job_id, status="failed", error=str(exc), finished_at=timezone.now())
+    else:
+        _update(job_id, status="done", finished_at=timezone.now())
+
+
+def resume_stale_jobs(stale_after, fail=False):
+    """Finish (or, with ``fail``, mark failed) jobs orphaned by a restart.
+
+    A pending or running job is orphaned when its updated_at is older
+    than ``stale_after`` (a timedelta); live workers touch it on every
+    chunk. Each job is claimed with a conditional UPDATE so two callers
+    never take the same one. Returns the ids handled.
+    """
+    cutoff = timezone.now() - stale_after
+    handled = []
+    stale = FanoutJob.objects.filter(status__in=["pending", "running"], updated_at__lt=cutoff).order_by("id")
+    for job_id, updated_at in stale.values_list("id", "updated_at"):
+        claim = {"status": "failed", "error": "Interrupted by a restart.", "finished_at": timezone.now()} if fail else {}
+        if not FanoutJob.objects.filter(pk=job_id, updated_at=updated_at).update(
+            updated_at=timezone.now(), **claim
+        ):
+            continue
+        if not fail:
+            run_job(job_id)
+        handled.append(job_id)
+    return handled
+
+
+def _run_in_worker(job_id):
+    try:
+        run_job(job_id)
+    finally:
+        # Worker threads get their own connection; don't leave it open.
+        connection.close()
+
+
+def submit(job):
+    """Queue a saved job once the transaction that created it commits."""
+    if getattr(settings, "NOTIFICATION_FANOUT", {}).get("ALWAYS_EAGER", False):
+        transaction.on_commit(lambda: run_job(job.pk))
+    else:
+        transaction.on_commit(lambda: _executor.submit(_run_in_worker, job.pk))
@@ -0,0 +1,20 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from notifications.fanout import resume_stale_jobs
+
+
+class Command(BaseCommand):
+    help = "Finish notification fan-out jobs left pending or running by a restart."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--stale-after", type=int, default=10,
+                            help="Minutes without progress before a job counts as orphaned (default 10).")
+        parser.add_argument("--fail", action="store_true",
+                            help="Mark orphaned jobs failed instead of finishing them.")
+
+    def handle(self, *args, **options):
+        handled = resume_stale_jobs(timedelta(minutes=options["stale_after"]), fail=options["fail"])
+        verb = "Marked failed" if options["fail"] else "Resumed"
+        self.stdout.write(self.style.SUCCESS(f"{verb} {len(handled)} fan-out job(s)."))
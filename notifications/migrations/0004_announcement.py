@@ -0,0 +1,109 @@
+# Generated by Django 5.2.5 on 2026-10-18 19:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Min
+
+
+def split_bodies(apps, schema_editor):
+    """Give each distinct (title, message) one Announcement row."""
+    Announcement = apps.get_model("notifications", "Announcement")
+    Notification = apps.get_model("notifications", "Notification")
+    bodies = (
+        Notification.objects.values("title", "message")
+        .annotate(first=Min("created_at"))
+        .order_by("first")
+    )
+    for body in bodies:
+        announcement = Announcement.objects.create(
+            title=body["title"], message=body["message"]
+        )
+        Announcement.objects.filter(pk=announcement.pk).update(created_at=body["first"])
+        Notification.objects.filter(
+            title=body["title"], message=body["message"]
+        ).update(announcement=announcement)
+
+
+def join_bodies(apps, schema_editor):
+    Notification = apps.get_model("notifications", "Notification")
+    for receipt in Notification.objects.select_related("announcement"):
+        receipt.title = receipt.announcement.title
+        receipt.message = receipt.announcement.message
+        receipt.save(update_fields=["title", "message"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("notifications", "0003_fanoutjob"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Announcement",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("title", models.CharField(max_length=255)),
+                ("message", models.TextField()),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name="notification",
+            name="announcement",
+            field=models.ForeignKey(
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="receipts",
+                to="notifications.announcement",
+            ),
+        ),
+        migrations.AddField(
+            model_name="fanoutjob",
+            name="announcement",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="+",
+                to="notifications.announcement",
+            ),
+        ),
+        migrations.RunPython(split_bodies, join_bodies),
+        # Defaults only so the columns can be added back when reversing.
+        migrations.AlterField(
+            model_name="notification",
+            name="title",
+            field=models.CharField(default="", max_length=255),
+        ),
+        migrations.AlterField(
+            model_name="notification",
+            name="message",
+            field=models.TextField(default=""),
+        ),
+        migrations.RemoveField(
+            model_name="notification",
+            name="title",
+        ),
+        migrations.RemoveField(
+            model_name="notification",
+            name="message",
+        ),
+        migrations.AlterField(
+            model_name="notification",
+            name="announcement",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="receipts",
+                to="notifications.announcement",
+            ),
+        ),
+    ]
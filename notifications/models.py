@@ -1,12 +1,76 @@
 from django.conf import settings
 from django.db import models
+from django.utils import timezone
+
+class Announcement(models.Model):
+    """The body of a notification, stored once however many users receive it."""
+
+    title = models.CharField(max_length=255)
+    message = models.TextField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.title
+
 
 class Notification(models.Model):
+    """A user's receipt for an Announcement: who got it and whether it was read."""
+
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="notifications")
+    announcement = models.ForeignKey(Announcement, on_delete=models.CASCADE, related_name="receipts")
+    created_at = models.DateTimeField(auto_now_add=True)
+    read = models.BooleanField(default=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["user", "created_at", "id"], name="notification_user_created_idx"),
+            # Only unread receipts are indexed, so the badge count and
+            # mark-read touch nothing the user has already read.
+            models.Index(
+                fields=["user", "id"], condition=models.Q(read=False), name="notification_unread_idx"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.user} - {self.announcement_id}"
+
+
+class FanoutJob(models.Model):
+    """One notification sent to many users, inserted by a background worker.
+
+    Exactly one of ``course``, ``role`` or ``user_ids`` selects the recipients.
+    """
+
+    STATUS_CHOICES = (
+        ("pending", "Pending"),
+        ("running", "Running"),
+        ("done", "Done"),
+        ("failed", "Failed"),
+    )
+
+    created_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, related_name="+")
     title = models.CharField(max_length=255)
     message = models.TextField()
+    announcement = models.ForeignKey(Announcement, on_delete=models.SET_NULL, null=True, blank=True, related_name="+")
+    course = models.ForeignKey("courses.Course", on_delete=models.SET_NULL, null=True, blank=True, related_name="+")
+    role = models.CharField(max_length=20, blank=True)
+    user_ids = models.JSONField(null=True, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default="pending")
+    delivered = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
-    read = models.BooleanField(default=False)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    # Set on every state change and delivered chunk; a running job whose
+    # updated_at stops moving was lost with its worker (see resume_stale_jobs).
+    updated_at = models.DateTimeField(auto_now=True)
+
+    @property
+    def rows_per_second(self):
+        if self.started_at is None:
+            return None
+        elapsed = ((self.finished_at or timezone.now()) - self.started_at).total_seconds()
+        return round(self.delivered / elapsed, 1) if elapsed > 0 else None
 
     def __str__(self):
-        return f"{self.user} - {self.title}"
+        return f"{self.title} ({self.status})"
@@ -0,0 +1,99 @@
+"""Push new notification receipts to connected stream clients.
+
+Publishers (request threads, fan-out workers) hand events to a broker;
+each open SSE connection holds a Subscription for its user. The default
+LocalBroker only reaches subscribers in the same process. A deployment
+with several worker processes swaps in a backend with the same
+subscribe/unsubscribe/publish/has_subscribers methods via
+``NOTIFICATION_STREAM["BROKER"]``.
+
+Events are a convenience, not the source of truth: a stream that misses
+any (queue overflow, another process) replays from the database.
+"""
+import asyncio
+import threading
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+from .serializers import NotificationSerializer
+
+
+class Subscription:
+    def __init__(self, user_id, queue_size):
+        self.user_id = user_id
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.overflowed = False
+
+    def put(self, event):
+        # Runs on the subscriber's event loop.
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.overflowed = True
+
+    async def get(self, timeout):
+        """The next event, or None if nothing arrived within ``timeout`` seconds."""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class LocalBroker:
+    """In-process pub/sub keyed by user id. ``publish`` is thread-safe."""
+
+    def __init__(self, queue_size=100):
+        self.queue_size = queue_size
+        self._subscriptions = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, user_id):
+        """Register a subscription; call from the event loop that will read it."""
+        subscription = Subscription(user_id, self.queue_size)
+        with self._lock:
+            self._subscriptions.setdefault(user_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.user_id, set())
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                self._subscriptions.pop(subscription.user_id, None)
+
+    def has_subscribers(self, user_id):
+        return user_id in self._subscriptions
+
+    def publish(self, user_id, event):
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(user_id, ()))
+        for subscription in subscriptions:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.put, event)
+            except RuntimeError:  # the loop has closed under a dead connection
+                self.unsubscribe(subscription)
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                config = getattr(settings, "NOTIFICATION_STREAM", {})
+                broker_class = import_string(config.get("BROKER", "notifications.pubsub.LocalBroker"))
+                _broker = broker_class(queue_size=config.get("QUEUE_SIZE", 100))
+    return _broker
+
+
+def publish_receipts(receipts):
+    """Publish saved Notification receipts (with ``announcement`` loaded) to their users."""
+    broker = get_broker()
+    for receipt in receipts:
+        if broker.has_subscribers(receipt.user_id):
+            broker.publish(receipt.user_id, NotificationSerializer(receipt).data)
@@ -1,7 +1,39 @@
+from django.contrib.auth import get_user_model
 from rest_framework import serializers
-from .models import Notification
+from .models import Announcement, FanoutJob, Notification
 
 class NotificationSerializer(serializers.ModelSerializer):
+    title = serializers.CharField(source="announcement.title", max_length=255)
+    message = serializers.CharField(source="announcement.message")
+
     class Meta:
         model = Notification
-        fields = "__all__"
+        fields = ["id", "user", "title", "message", "created_at", "read"]
+
+    def create(self, validated_data):
+        validated_data["announcement"] = Announcement.objects.create(**validated_data["announcement"])
+        return super().create(validated_data)
+
+
+class FanoutJobSerializer(serializers.ModelSerializer):
+    role = serializers.ChoiceField(choices=get_user_model().ROLE_CHOICES, required=False, allow_blank=True)
+    user_ids = serializers.ListField(child=serializers.IntegerField(), required=False, allow_null=True)
+    rows_per_second = serializers.FloatField(read_only=True)
+
+    class Meta:
+        model = FanoutJob
+        fields = [
+            "id", "title", "message", "course", "role", "user_ids", "status", "delivered",
+            "rows_per_second", "error", "created_at", "started_at", "finished_at",
+        ]
+        read_only_fields = ["status", "delivered", "error", "created_at", "started_at", "finished_at"]
+
+    def validate(self, attrs):
+        targets = [key for key in ("course", "role", "user_ids") if attrs.get(key)]
+        if len(targets) != 1:
+            raise serializers.ValidationError("Give exactly one of course, role or user_ids.")
+        return attrs
+
+
+class MarkReadSerializer(serializers.Serializer):
+    up_to = serializers.IntegerField(min_value=1)
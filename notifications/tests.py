@@ -1,3 +1,225 @@
-from django.test import TestCase
+from datetime import timedelta
+from io import StringIO
 
-# Create your tests here.
+from asgiref.sync import async_to_sync, sync_to_async
+from django.core.management import call_command
+from django.db import connection
+from django.test import override_settings
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from accounts.models import User
+from courses.models import Course, Enrollment
+
+from . import fanout
+from .async_views import event_stream
+from .pubsub import get_broker
+from .tokens import StreamToken
+from .models import Announcement, FanoutJob, Notification
+
+
+@override_settings(NOTIFICATION_FANOUT={"ALWAYS_EAGER": True})
+class FanoutTests(APITestCase):
+    def setUp(self):
+        self.admin = User.objects.create(username="admin", role="admin", is_staff=True)
+        teacher = User.objects.create(username="teacher", role="teacher")
+        self.course = Course.objects.create(title="C", description="d", teacher=teacher)
+        self.students = [User.objects.create(username=f"s{i}", role="student") for i in range(5)]
+        Enrollment.objects.bulk_create(Enrollment(course=self.course, student=s) for s in self.students[:3])
+        self.client.force_authenticate(self.admin)
+
+    def post(self, **target):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                "/api/notifications/fanout/", {"title": "Hi", "message": "Hello", **target}, format="json"
+            )
+        return response
+
+    def test_course_fanout_reaches_enrolled_students(self):
+        chunk_size, fanout.CHUNK_SIZE = fanout.CHUNK_SIZE, 2
+        self.addCleanup(setattr, fanout, "CHUNK_SIZE", chunk_size)
+
+        response = self.post(course=self.course.id)
+
+        self.assertEqual(response.status_code, 202)
+        job = self.client.get(f"/api/notifications/fanout/{response.data['id']}/").data
+        self.assertEqual((job["status"], job["delivered"]), ("done", 3))
+        self.assertIsNotNone(job["rows_per_second"])
+        self.assertEqual(
+            set(Notification.objects.values_list("user_id", flat=True)), {s.id for s in self.students[:3]}
+        )
+        self.assertEqual(Announcement.objects.count(), 1)
+
+    def test_role_and_id_targets(self):
+        self.post(role="teacher")
+        self.post(user_ids=[self.students[4].id, 999999])
+        self.assertEqual(list(FanoutJob.objects.order_by("id").values_list("delivered", flat=True)), [1, 1])
+
+    def test_exactly_one_target_is_required(self):
+        self.assertEqual(self.post().status_code, 400)
+        self.assertEqual(self.post(role="student", course=self.course.id).status_code, 400)
+
+    def test_interrupted_job_resumes_after_the_last_delivered_chunk(self):
+        announcement = Announcement.objects.create(title="Hi", message="Hello")
+        job = FanoutJob.objects.create(
+            title="Hi", message="Hello", course=self.course, announcement=announcement,
+            status="running", delivered=1, started_at=timezone.now(),
+        )
+        Notification.objects.create(user=self.students[0], announcement=announcement)
+        stale = timezone.now() - timedelta(minutes=30)
+        FanoutJob.objects.filter(pk=job.pk).update(updated_at=stale)
+        fresh = FanoutJob.objects.create(title="Live", message="x", role="teacher", status="running")
+
+        out = StringIO()
+        call_command("resume_fanout", stdout=out)
+
+        self.assertIn("Resumed 1", out.getvalue())
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.delivered), ("done", 3))
+        self.assertEqual(
+            sorted(Notification.objects.values_list("user_id", flat=True)), sorted(s.id for s in self.students[:3])
+        )
+        self.assertEqual(FanoutJob.objects.get(pk=fresh.pk).status, "running")
+
+    def test_orphaned_jobs_can_be_marked_failed(self):
+        job = FanoutJob.objects.create(title="Hi", message="Hello", role="student")
+        FanoutJob.objects.filter(pk=job.pk).update(updated_at=timezone.now() - timedelta(hours=1))
+        call_command("resume_fanout", "--fail", stdout=StringIO())
+        job.refresh_from_db()
+        self.assertEqual(job.status, "failed")
+        self.assertFalse(Notification.objects.exists())
+
+    def test_only_admins_can_fan_out(self):
+        self.client.force_authenticate(self.students[0])
+        self.assertEqual(self.post(role="student").status_code, 403)
+
+
+class NotificationListTests(APITestCase):
+    def setUp(self):
+        self.admin = User.objects.create(username="admin", role="admin", is_staff=True)
+        self.student = User.objects.create(username="student", role="student")
+
+    def test_created_notification_keeps_the_flat_shape(self):
+        self.client.force_authenticate(self.admin)
+        response = self.client.post(
+            "/api/notifications/create/", {"user": self.student.id, "title": "Hi", "message": "Hello"}
+        )
+        self.assertEqual(response.status_code, 201)
+
+        self.client.force_authenticate(self.student)
+        with self.assertNumQueries(1):
+            results = self.client.get("/api/notifications/").data["results"]
+        self.assertEqual(
+            list(results[0]), ["id", "user", "title", "message", "created_at", "read"]
+        )
+        self.assertEqual((results[0]["title"], results[0]["message"]), ("Hi", "Hello"))
+
+
+class UnreadTests(APITestCase):
+    def setUp(self):
+        self.student = User.objects.create(username="student", role="student")
+        other = User.objects.create(username="other", role="student")
+        announcement = Announcement.objects.create(title="Hi", message="Hello")
+        self.receipts = Notification.objects.bulk_create(
+            [Notification(user=self.student, announcement=announcement) for _ in range(4)]
+            + [Notification(user=other, announcement=announcement)]
+        )
+        self.client.force_authenticate(self.student)
+
+    def unread(self):
+        return self.client.get("/api/notifications/unread-count/").data["unread"]
+
+    def test_unread_count_uses_the_partial_index(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(self.unread(), 4)
+
+        sql, params = Notification.objects.filter(user=self.student, read=False).query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute("EXPLAIN QUERY PLAN " + sql, params)
+            plan = " ".join(str(row) for row in cursor.fetchall())
+        self.assertIn("notification_unread_idx", plan)
+
+    def test_mark_read_up_to_id(self):
+        up_to = self.receipts[1].id
+        with self.assertNumQueries(1):
+            response = self.client.post("/api/notifications/mark-read/", {"up_to": up_to})
+        self.assertEqual(response.data, {"marked": 2})
+        self.assertEqual(self.unread(), 2)
+        self.assertFalse(Notification.objects.get(pk=self.receipts[4].id).read)
+
+    def test_mark_read_needs_an_id(self):
+        self.assertEqual(self.client.post("/api/notifications/mark-read/", {}).status_code, 400)
+
+
+class NotificationStreamTests(APITestCase):
+    def setUp(self):
+        self.admin = User.objects.create(username="admin", role="admin", is_staff=True)
+        self.student = User.objects.create(username="student", role="student")
+        announcement = Announcement.objects.create(title="Old", message="Missed")
+        self.missed = Notification.objects.bulk_create(
+            [Notification(user=self.student, announcement=announcement) for _ in range(3)]
+        )
+
+    async def next_event(self, stream):
+        while True:
+            frame = await anext(stream)
+            if frame.startswith("id: "):
+                return frame
+
+    def create_notification(self):
+        self.client.force_authenticate(self.admin)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(
+                "/api/notifications/create/", {"user": self.student.id, "title": "New", "message": "Live"}
+            )
+
+    @async_to_sync
+    async def test_resumes_from_last_event_id_then_streams_live(self):
+        stream = event_stream(self.student.id, last_event_id=self.missed[0].id, heartbeat=0.01)
+        replayed = [await self.next_event(stream) for _ in range(2)]
+        self.assertEqual(
+            [frame.split("\n")[0] for frame in replayed],
+            [f"id: {receipt.id}" for receipt in self.missed[1:]],
+        )
+
+        await sync_to_async(self.create_notification)()
+        live = await self.next_event(stream)
+        self.assertIn('"title": "New"', live)
+
+        await stream.aclose()
+        self.assertFalse(get_broker().has_subscribers(self.student.id))
+
+    def test_stream_is_refused_outside_asgi(self):
+        self.assertEqual(self.client.get("/api/notifications/stream/").status_code, 501)
+
+    @async_to_sync
+    async def test_stream_requires_authentication(self):
+        self.assertEqual((await self.async_client.get("/api/notifications/stream/")).status_code, 401)
+
+    @async_to_sync
+    async def test_stream_accepts_a_stream_token_in_the_query(self):
+        await sync_to_async(self.client.force_authenticate)(self.student)
+        response = await sync_to_async(self.client.post)("/api/notifications/stream-token/")
+        token = response.json()["token"]
+
+        response = await self.async_client.get(f"/api/notifications/stream/?token={token}&last_event_id=0")
+        self.assertEqual(response.status_code, 200)
+        stream = response.streaming_content
+        self.assertEqual(await anext(stream), b"retry: 3000\n\n")
+        self.assertTrue((await anext(stream)).startswith(f"id: {self.missed[0].id}\n".encode()))
+        await stream.aclose()
+
+        # A stream token is good for nothing else, and only while fresh.
+        await sync_to_async(self.client.force_authenticate)(None)
+        listing = await sync_to_async(self.client.get)(
+            "/api/notifications/", HTTP_AUTHORIZATION=f"Bearer {token}"
+        )
+        self.assertEqual(listing.status_code, 401)
+        expired = await sync_to_async(self.expired_stream_token)()
+        response = await self.async_client.get(f"/api/notifications/stream/?token={expired}")
+        self.assertEqual(response.status_code, 401)
+
+    def expired_stream_token(self):
+        token = StreamToken.for_user_id(self.student.id)
+        token.set_exp(lifetime=timedelta(seconds=-1))
+        return str(token)
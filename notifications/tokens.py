@@ -0,0 +1,27 @@
+from datetime import timedelta
+
+from django.conf import settings
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from accounts.authentication import VERSION_CLAIM, get_token_state
+
+
+class StreamToken(AccessToken):
+    """Short-lived token for opening the notification stream.
+
+    Browsers' EventSource cannot send an Authorization header, so the
+    stream also accepts this token in its query string. It has its own
+    token_type, so it is rejected everywhere else, and it is only checked
+    when the connection opens.
+    """
+
+    token_type = "notification_stream"
+    lifetime = timedelta(seconds=getattr(settings, "NOTIFICATION_STREAM", {}).get("TOKEN_LIFETIME", 60))
+
+    @classmethod
+    def for_user_id(cls, user_id):
+        token = cls()
+        token[api_settings.USER_ID_CLAIM] = user_id
+        token[VERSION_CLAIM] = get_token_state(user_id).version
+        return token
@@ -1,8 +1,18 @@
 from django.urls import path
-from .views import NotificationListView, NotificationCreateView, NotificationDeleteView
+from . import async_views
+from .views import (
+    NotificationListView, NotificationCreateView, NotificationDeleteView, FanoutCreateView, FanoutDetailView,
+    UnreadCountView, MarkReadView, StreamTokenView,
+)
 
 urlpatterns = [
     path('', NotificationListView.as_view(), name="notification-list"),
+    path('stream/', async_views.notification_stream, name="notification-stream"),
+    path('stream-token/', StreamTokenView.as_view(), name="notification-stream-token"),
+    path('unread-count/', UnreadCountView.as_view(), name="notification-unread-count"),
+    path('mark-read/', MarkReadView.as_view(), name="notification-mark-read"),
     path('create/', NotificationCreateView.as_view(), name="notification-create"),
+    path('fanout/', FanoutCreateView.as_view(), name="notification-fanout"),
+    path('fanout/<int:pk>/', FanoutDetailView.as_view(), name="notification-fanout-detail"),
     path('<int:pk>/delete/', NotificationDeleteView.as_view(), name="notification-delete"),
 ]
@@ -1,14 +1,58 @@
 from rest_framework import generics, permissions
-from .models import Notification
-from .serializers import NotificationSerializer
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from django.db import transaction
+from . import fanout
+from .models import FanoutJob, Notification
+from .pubsub import publish_receipts
+from .serializers import FanoutJobSerializer, MarkReadSerializer, NotificationSerializer
+from .tokens import StreamToken
 
 # List user notifications
 class NotificationListView(generics.ListAPIView):
     serializer_class = NotificationSerializer
     permission_classes = [permissions.IsAuthenticated]
+    keyset_ordering = ("-created_at", "-id")
 
     def get_queryset(self):
-        return Notification.objects.filter(user=self.request.user).order_by("-created_at")
+        return (
+            Notification.objects.filter(user_id=self.request.user.id)
+            .select_related("announcement")
+            .order_by("-created_at")
+        )
+
+
+# Badge count; answered from the partial index on unread receipts.
+class UnreadCountView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        unread = Notification.objects.filter(user_id=request.user.id, read=False).count()
+        return Response({"unread": unread})
+
+
+# Mark every notification up to and including id N read, in one UPDATE.
+# Taking N from the newest item the client has shown avoids marking
+# notifications that arrived after it rendered.
+class MarkReadView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request):
+        serializer = MarkReadSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        marked = Notification.objects.filter(
+            user_id=request.user.id, read=False, id__lte=serializer.validated_data["up_to"]
+        ).update(read=True)
+        return Response({"marked": marked})
+
+
+class StreamTokenView(APIView):
+    """Mint a StreamToken for ``stream/?token=...`` (EventSource can't set headers)."""
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request):
+        token = StreamToken.for_user_id(request.user.id)
+        return Response({"token": str(token), "expires_in": int(StreamToken.lifetime.total_seconds())})
 
 
 # Create notification (for admin/teacher)
@@ -16,6 +60,31 @@ class NotificationCreateView(generics.CreateAPIView):
     serializer_class = NotificationSerializer
     permission_classes = [permissions.IsAdminUser]  # only admin/teacher
 
+    def perform_create(self, serializer):
+        receipt = serializer.save()
+        transaction.on_commit(lambda: publish_receipts([receipt]))
+
+# Send one notification to a course, a role or a list of users.
+# Rows are inserted in the background; poll the job for progress.
+class FanoutCreateView(generics.CreateAPIView):
+    serializer_class = FanoutJobSerializer
+    permission_classes = [permissions.IsAdminUser]
+
+    def perform_create(self, serializer):
+        job = serializer.save(created_by_id=self.request.user.id)
+        fanout.submit(job)
+
+    def create(self, request, *args, **kwargs):
+        response = super().create(request, *args, **kwargs)
+        response.status_code = 202
+        return response
+
+
+class FanoutDetailView(generics.RetrieveAPIView):
+    queryset = FanoutJob.objects.all()
+    serializer_class = FanoutJobSerializer
+    permission_classes = [permissions.IsAdminUser]
+
 # Delete notification
 class NotificationDeleteView(generics.DestroyAPIView):
     queryset = Notification.objects.all()
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from reviews.ratings import rebuild_ratings
+
+
+class Command(BaseCommand):
+    help = "Rebuild the Course rating counters from reviews."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--course", type=int, action="append", dest="courses",
+                            help="Only rebuild this course id (may be repeated).")
+        parser.add_argument("--verify", action="store_true",
+                            help="Report drift without fixing it; exits non-zero if any is found.")
+
+    def handle(self, *args, **options):
+        drift = rebuild_ratings(options["courses"], fix=not options["verify"])
+        for line in drift:
+            self.stdout.write(line)
+
+        if options["verify"]:
+            if drift:
+                raise CommandError(f"{len(drift)} course rating counter(s) out of sync.")
+            self.stdout.write(self.style.SUCCESS("Rating counters are in sync."))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"Rebuilt rating counters, fixed {len(drift)} drift(s)."))
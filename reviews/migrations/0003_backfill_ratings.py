@@ -0,0 +1,35 @@
+# Generated by Django 5.2.5 on 2026-10-18 19:10
+
+from django.db import migrations
+from django.db.models import Count, Q, Sum
+
+
+def backfill_ratings(apps, schema_editor):
+    Course = apps.get_model("courses", "Course")
+    Review = apps.get_model("reviews", "Review")
+    rows = (
+        Review.objects.order_by()
+        .values("course_id")
+        .annotate(
+            rating_count=Count("id"),
+            rating_sum=Sum("rating"),
+            **{
+                f"rating_{star}": Count("id", filter=Q(rating=star))
+                for star in range(1, 6)
+            },
+        )
+    )
+    for row in rows:
+        Course.objects.filter(pk=row.pop("course_id")).update(**row)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("courses", "0013_course_rating_counters"),
+        ("reviews", "0002_keyset_indexes"),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_ratings, migrations.RunPython.noop),
+    ]
@@ -15,6 +15,7 @@ class Review(models.Model):
             models.UniqueConstraint(fields=["course", "user"], name="unique_review_per_user_per_course")
         ]
         ordering = ["-created_at"]
+        indexes = [models.Index(fields=["course", "created_at", "id"], name="review_course_created_idx")]
 
     def __str__(self):
         return f"{self.user} - {self.course} ({self.rating})"
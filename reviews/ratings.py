@@ -0,0 +1,75 @@
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+
+from courses.models import Course
+
+from .models import Review
+
+STARS = range(1, 6)
+STAR_FIELDS = [f"rating_{star}" for star in STARS]
+
+
+# Counter maintenance. Callers run these in the same transaction as the
+# review write they account for.
+
+def rating_added(course_id, rating):
+    Course.objects.filter(pk=course_id).update(
+        rating_count=F("rating_count") + 1,
+        rating_sum=F("rating_sum") + rating,
+        **{f"rating_{rating}": F(f"rating_{rating}") + 1},
+    )
+
+
+def rating_removed(course_id, rating):
+    Course.objects.filter(pk=course_id).update(
+        rating_count=F("rating_count") - 1,
+        rating_sum=F("rating_sum") - rating,
+        **{f"rating_{rating}": F(f"rating_{rating}") - 1},
+    )
+
+
+def rating_changed(course_id, old, new):
+    if old == new:
+        return
+    Course.objects.filter(pk=course_id).update(
+        rating_sum=F("rating_sum") + (new - old),
+        **{f"rating_{old}": F(f"rating_{old}") - 1, f"rating_{new}": F(f"rating_{new}") + 1},
+    )
+
+
+def actual_ratings(course_ids=None):
+    """{course_id: {counter field: value}} computed from the reviews themselves."""
+    reviews = Review.objects.order_by().values("course_id")
+    if course_ids is not None:
+        reviews = reviews.filter(course_id__in=course_ids)
+    rows = reviews.annotate(
+        rating_count=Count("id"),
+        rating_sum=Sum("rating"),
+        **{f"rating_{star}": Count("id", filter=Q(rating=star)) for star in STARS},
+    )
+    return {row.pop("course_id"): row for row in rows}
+
+
+def rebuild_ratings(course_ids=None, fix=True):
+    """Recompute rating counters from reviews and report drift.
+
+    Reviews deleted by a cascade (a user account removed) bypass the
+    views, so drift is expected over time; run this periodically.
+    """
+    fields = ["rating_count", "rating_sum", *STAR_FIELDS]
+    empty = dict.fromkeys(fields, 0)
+    courses = Course.objects.order_by("id").only(*fields)
+    if course_ids is not None:
+        courses = courses.filter(pk__in=course_ids)
+
+    drift = []
+    with transaction.atomic():
+        actual = actual_ratings(course_ids)
+        for course in courses.select_for_update():
+            expected = actual.get(course.id, empty)
+            current = {field: getattr(course, field) for field in fields}
+            if current != expected:
+                drift.append(f"course {course.id}: ratings {current} != {expected}")
+                if fix:
+                    Course.objects.filter(pk=course.id).update(**expected)
+    return drift
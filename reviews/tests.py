@@ -1,3 +1,58 @@
-from django.test import TestCase
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
 
-# Create your tests here.
+from accounts.models import User
+from courses.models import Course
+
+from .models import Review
+from .ratings import rebuild_ratings
+
+
+class RatingCounterTests(APITestCase):
+    def setUp(self):
+        teacher = User.objects.create(username="teacher", role="teacher")
+        self.course = Course.objects.create(title="C", description="d", teacher=teacher)
+        self.students = [User.objects.create(username=f"s{i}", role="student") for i in range(3)]
+
+    def review(self, student, rating):
+        self.client.force_authenticate(student)
+        response = self.client.post(f"/api/courses/{self.course.id}/reviews/", {"rating": rating})
+        self.assertEqual(response.status_code, 201)
+        return response.data["id"]
+
+    def rating(self):
+        return self.client.get(f"/api/courses/{self.course.id}/").data["rating"]
+
+    def test_counters_follow_create_update_and_delete(self):
+        first = self.review(self.students[0], 5)
+        self.review(self.students[1], 3)
+        self.assertEqual(self.rating(), {
+            "count": 2, "average": 4.0, "histogram": {"1": 0, "2": 0, "3": 1, "4": 0, "5": 1},
+        })
+
+        self.client.force_authenticate(self.students[0])
+        self.client.patch(f"/api/reviews/{first}/", {"rating": 1})
+        self.assertEqual(self.rating()["histogram"], {"1": 1, "2": 0, "3": 1, "4": 0, "5": 0})
+
+        self.client.delete(f"/api/reviews/{first}/")
+        self.assertEqual(self.rating(), {
+            "count": 1, "average": 3.0, "histogram": {"1": 0, "2": 0, "3": 1, "4": 0, "5": 0},
+        })
+        self.assertEqual(rebuild_ratings(fix=False), [])
+
+    def test_course_list_reads_no_reviews(self):
+        self.review(self.students[0], 4)
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get("/api/courses/")
+        self.assertEqual(response.data["results"][0]["rating"]["count"], 1)
+        self.assertFalse(any("reviews_review" in q["sql"] for q in ctx.captured_queries))
+
+    def test_rebuild_fixes_drift(self):
+        self.review(self.students[0], 4)
+        Review.objects.create(course=self.course, user=self.students[1], rating=2)  # bypasses the view
+
+        self.assertEqual(len(rebuild_ratings()), 1)
+        self.course.refresh_from_db()
+        self.assertEqual((self.course.rating_count, self.course.rating_sum, self.course.rating_2), (2, 6, 1))
+        self.assertEqual(rebuild_ratings(fix=False), [])
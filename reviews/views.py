@@ -1,13 +1,16 @@
+from django.db import transaction
 from rest_framework import generics
 from rest_framework.exceptions import PermissionDenied, ValidationError
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from .models import Review
 from .serializers import ReviewSerializer
 from courses.models import Course
+from .ratings import rating_added, rating_changed, rating_removed
 
 class ReviewListCreateView(generics.ListCreateAPIView):
     serializer_class = ReviewSerializer
     permission_classes = [IsAuthenticated]  # listing could be AllowAny if you prefer public viewing
+    keyset_ordering = ("-created_at", "-id")
 
     def get_queryset(self):
         course_id = self.kwargs["course_id"]
@@ -25,10 +28,12 @@ class ReviewListCreateView(generics.ListCreateAPIView):
         #     raise PermissionDenied("You must be enrolled to review this course.")
 
         # Prevent duplicate (safety)
-        if Review.objects.filter(course=course, user=self.request.user).exists():
+        if Review.objects.filter(course=course, user_id=self.request.user.id).exists():
             raise ValidationError("You have already reviewed this course.")
 
-        serializer.save(user=self.request.user, course=course)
+        with transaction.atomic():
+            review = serializer.save(user_id=self.request.user.id, course=course)
+            rating_added(course.id, review.rating)
 
 
 class ReviewDetailView(generics.RetrieveUpdateDestroyAPIView):
@@ -39,6 +44,21 @@ class ReviewDetailView(generics.RetrieveUpdateDestroyAPIView):
     def check_object_permissions(self, request, obj):
         # allow read for authenticated users (or AllowAny if you want public)
         if request.method in ("PUT", "PATCH", "DELETE"):
-            if obj.user != request.user:
+            if obj.user_id != request.user.id:
                 raise PermissionDenied("You can only edit or delete your own review.")
         return super().check_object_permissions(request, obj)
+
+    def perform_update(self, serializer):
+        with transaction.atomic():
+            # Re-read under lock so concurrent edits each move the counters once.
+            old = Review.objects.select_for_update().values_list("rating", flat=True).get(pk=serializer.instance.pk)
+            review = serializer.save()
+            rating_changed(review.course_id, old, review.rating)
+
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            rating = Review.objects.select_for_update().filter(pk=instance.pk).values_list("rating", flat=True).first()
+            if rating is None:
+                return
+            instance.delete()
+            rating_removed(instance.course_id, rating)